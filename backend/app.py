@@ -1,57 +1,466 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
+from flask.json import JSONEncoder
 from flask_cors import CORS
+from werkzeug.formparser import FormDataParser
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForSequenceClassification, pipeline, AutoModelForMaskedLM
-import torch
+import json
 import os
-import re
+import time
+from functools import wraps
+
+from extractive import ExtractiveSummarizer, SENTENCE_SPLIT_REGEX
+from incremental import IncrementalAnalyzer
+from inference_backends import optimize_model
+from inference_scheduler import GenerationScheduler
+from ingest import CappedStream, MappedDocument, UploadTooLarge, iter_sentence_blocks, iter_sentences, read_prefix, spool_stream
+from judgment_scorer import JudgmentScorer
+from metrics import (
+    metrics, REQUEST_SECONDS, bind_request, unbind_request, current_labels, count_fallback,
+    record_stage, stage
+)
+from model_registry import ModelRegistry
+from profiling import maybe_profile
+from result_cache import ResultCache, make_key
+from statute_index import get_statute_index
+from statute_matcher import match_statutes, match_statutes_stream
+from statute_retrieval import SemanticStatuteFinder, merge_statutes
+from streaming import stream_generate, streaming_kwargs, time_to_first_token
+from summarization import MapReduceSummarizer
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
-# Global variables to store models and tokenizers
-models = {}
-tokenizers = {}
-pipelines = {}
+class TimedJSONEncoder(JSONEncoder):
+    # Charge jsonify() serialization to the current request's "serialize" stage
+    def encode(self, o):
+        with stage("serialize"):
+            return super().encode(o)
+
+app.json_encoder = TimedJSONEncoder
+
+# Models are loaded on first use through the registry and evicted after
+# MODEL_IDLE_TTL seconds without use or when MODEL_MEMORY_BUDGET_MB is exceeded
+registry = ModelRegistry(
+    idle_ttl=float(os.environ.get('MODEL_IDLE_TTL', 0)) or None,
+    memory_budget=int(float(os.environ.get('MODEL_MEMORY_BUDGET_MB', 0)) * 1024 * 1024) or None
+)
+
+# CPU inference backend per model: fp32, int8, bf16 or compile
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'fp32')
+BERT_BACKEND = os.environ.get('BERT_BACKEND', INFERENCE_BACKEND)
+LED_BACKEND = os.environ.get('LED_BACKEND', INFERENCE_BACKEND)
+
+# InLegalBERT for Indian legal domain
+def load_inlegalbert():
+    tokenizer = AutoTokenizer.from_pretrained("law-ai/InLegalBERT")
+    model = optimize_model(AutoModelForMaskedLM.from_pretrained("law-ai/InLegalBERT"), BERT_BACKEND)
+    # The fill-mask pipeline shares the same model instance
+    fill_mask = pipeline("fill-mask", model=model, tokenizer=tokenizer)
+    return {"model": model, "tokenizer": tokenizer, "fill-mask": fill_mask}
+
+# Legal-LED for long documents
+def load_legal_led():
+    tokenizer = AutoTokenizer.from_pretrained("nsi319/legal-led-base-16384")
+    model = optimize_model(AutoModelForSeq2SeqLM.from_pretrained("nsi319/legal-led-base-16384"), LED_BACKEND)
+    return {"model": model, "tokenizer": tokenizer}
+
+# Mistral for generation tasks (as a fallback for tasks InLegalBERT can't do)
+def load_mistral():
+    # We don't load the model here to save memory, we'll use the API for this
+    return {"tokenizer": AutoTokenizer.from_pretrained("mistralai/Mistral-7B-Instruct-v0.2")}
+
+registry.register("inlegalbert", load_inlegalbert)
+registry.register("legal-led", load_legal_led)
+registry.register("mistral", load_mistral)
+
+def get_legal_led():
+    components = registry.get("legal-led")
+    return components["model"], components["tokenizer"]
+
+# Legal-LED generation goes through a micro-batching scheduler so concurrent
+# requests share one padded generate() call instead of serializing
+led_scheduler = GenerationScheduler(
+    get_legal_led,
+    max_batch_size=int(os.environ.get('LED_MAX_BATCH_SIZE', 8)),
+    max_wait_ms=float(os.environ.get('LED_MAX_WAIT_MS', 20)),
+    num_threads=int(os.environ.get('LED_TORCH_THREADS', 0)) or None
+)
+
+def get_inlegalbert():
+    components = registry.get("inlegalbert")
+    return components["model"], components["tokenizer"]
+
+# Extractive summaries from InLegalBERT sentence embeddings
+extractive_summarizer = ExtractiveSummarizer(
+    get_inlegalbert,
+    batch_size=int(os.environ.get('EMBED_BATCH_SIZE', 32)),
+    # Uploads are ranked a block at a time; these bound how much of one
+    max_stream_sentences=int(os.environ.get('EXTRACTIVE_MAX_SENTENCES', 100000)) or None,
+    time_limit=float(os.environ.get('EXTRACTIVE_TIMEOUT', 300)) or None
+)
+
+# Semantic statute retrieval over precomputed InLegalBERT section embeddings
+semantic_finder = SemanticStatuteFinder(
+    get_inlegalbert,
+    get_statute_index,
+    min_score=float(os.environ.get('SEMANTIC_MIN_SCORE', 0.5)),
+    batch_size=int(os.environ.get('EMBED_BATCH_SIZE', 32))
+)
+
+# Map-reduce summarization for documents longer than one model window
+map_reduce_summarizer = MapReduceSummarizer(
+    led_scheduler,
+    get_legal_led,
+    window=int(os.environ.get('LED_CHUNK_TOKENS', 0)) or None,
+    max_chunks=int(os.environ.get('LED_MAX_CHUNKS', 16)),
+    time_limit=float(os.environ.get('LED_MAP_REDUCE_TIMEOUT', 300)),
+    max_levels=int(os.environ.get('LED_MAX_REDUCE_LEVELS', 4))
+)
+
+# Per-chunk memo for re-analysing edited documents sent with a document_id
+incremental = IncrementalAnalyzer(
+    extractive_summarizer,
+    map_reduce_summarizer,
+    max_bytes=int(os.environ.get('INCREMENTAL_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    max_documents=int(os.environ.get('INCREMENTAL_MAX_DOCUMENTS', 1024))
+)
+
+# Optional comma-separated list of models to load before serving
+registry.warm_up([name.strip() for name in os.environ.get('MODEL_WARMUP', '').split(',') if name.strip()])
+registry.start_reaper()
 
-# Initialize models
-def load_models():
-    # InLegalBERT for Indian legal domain
+# Generation parameters for Legal-LED, also part of the result cache key
+SUMMARY_GEN_KWARGS = dict(max_length=250, min_length=50, length_penalty=2.0, num_beams=4, early_stopping=True)
+PREDICTION_GEN_KWARGS = dict(max_length=300, min_length=100, length_penalty=2.0, num_beams=4, early_stopping=True)
+GENERATION_PARAMS = {
+    ("summarize", "legal-led"): SUMMARY_GEN_KWARGS,
+    ("predict-judgment", "legal-led"): PREDICTION_GEN_KWARGS,
+}
+
+# Content-addressed result cache shared by all endpoints
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+    disk_path=os.environ.get('RESULT_CACHE_PATH')
+)
+
+def cached_endpoint(endpoint, text_field, param_fields=(), exact_text=False):
+    # Serve repeated requests from the result cache. Clients can skip the
+    # cache with {"cache": false} or a "Cache-Control: no-cache" header.
+    # Requests with a document_id go through the incremental path instead.
+    # exact_text keys on the text as sent, for results that depend on its
+    # whitespace: offsets into it, sentences returned verbatim, or statute
+    # links found within a character window.
+    def decorator(view):
+        @wraps(view)
+        def wrapper():
+            data = request.json
+            if not data or text_field not in data:
+                return view()
+            # Streamed responses aren't cached and must not be answered with
+            # a cached JSON result
+            if (data.get('cache', True) is False or request.headers.get('Cache-Control') == 'no-cache'
+                    or data.get('document_id') is not None or data.get('stream')):
+                result_cache.record_bypass(endpoint)
+                return view()
+
+            model_name = data.get('model', 'inlegalbert')
+            params = {field: data.get(field) for field in param_fields}
+            params.update(GENERATION_PARAMS.get((endpoint, model_name), {}))
+            with stage("cache_lookup"):
+                key = make_key(endpoint, model_name, data[text_field], params, normalize=not exact_text)
+                cached = result_cache.get(endpoint, key)
+            if cached is not None:
+                return jsonify(cached)
+
+            response = view()
+            # Only cache successful primary results, never errors or fallbacks
+            if not isinstance(response, tuple):
+                result = response.get_json()
+                if result and result.get("success") and "note" not in result:
+                    result_cache.put(key, result)
+            return response
+        return wrapper
+    return decorator
+
+def sse_event(event, data):
+    # Format one Server-Sent Event with a JSON payload
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_events(events, model_used):
+    # Stream summarizer stage events; the final event carries the usual fields
     try:
-        print("Loading InLegalBERT model...")
-        tokenizers["inlegalbert"] = AutoTokenizer.from_pretrained("law-ai/InLegalBERT")
-        models["inlegalbert"] = AutoModelForMaskedLM.from_pretrained("law-ai/InLegalBERT")
-        # Create a fill-mask pipeline for InLegalBERT
-        pipelines["fill-mask"] = pipeline("fill-mask", model="law-ai/InLegalBERT")
-        print("InLegalBERT model loaded successfully")
+        for event in events:
+            if event["stage"] == "final":
+                yield sse_event("final", {
+                    "summary": event["summary"],
+                    "success": True,
+                    "model_used": model_used,
+                    "chunks": event["chunks"],
+                    "truncated": event["truncated"]
+                })
+            else:
+                yield sse_event(event["stage"], event)
     except Exception as e:
-        print(f"Error loading InLegalBERT model: {str(e)}")
-    
-    # Legal-LED for long documents
+        print(f"Error in streaming summarization: {str(e)}")
+        yield sse_event("error", {"error": str(e), "success": False})
+
+def stream_tokens(text, gen_kwargs, sample, output_field, final_fields, started=None):
+    # Stream Legal-LED output token by token; the final event carries the
+    # complete text plus the same fields as the non-streaming response.
+    # `started` is the request's arrival time, captured in the view since
+    # this body only runs after the request hooks have finished.
     try:
-        print("Loading Legal-LED model...")
-        tokenizers["legal-led"] = AutoTokenizer.from_pretrained("nsi319/legal-led-base-16384")
-        models["legal-led"] = AutoModelForSeq2SeqLM.from_pretrained("nsi319/legal-led-base-16384")
-        print("Legal-LED model loaded successfully")
+        model, tokenizer = get_legal_led()
+        pieces = []
+        for piece in stream_generate(model, tokenizer, text, streaming_kwargs(gen_kwargs, sample), started=started):
+            pieces.append(piece)
+            yield sse_event("token", {"text": piece})
+        yield sse_event("final", {output_field: "".join(pieces).strip(), **final_fields})
     except Exception as e:
-        print(f"Error loading Legal-LED model: {str(e)}")
+        print(f"Error in streaming generation: {str(e)}")
+        yield sse_event("error", {"error": str(e), "success": False})
+
+# Weighted plaintiff/defendant cues for the rule-based prediction path
+judgment_scorer = JudgmentScorer.from_file(os.environ.get('JUDGMENT_CUES_PATH'))
+
+def inlegalbert_summary(text, summary_type, num_sentences=5, important_sentences=None):
+    # Pick central, non-redundant sentences with InLegalBERT embeddings
+    if important_sentences is None:
+        important_sentences = extractive_summarizer.select(text, num_sentences)
+    
+    if summary_type == "extractive":
+        return " ".join(important_sentences)
+    
+    # For abstractive, we'll use a template over the top sentences
+    if len(important_sentences) > 0:
+        summary = f"This legal document discusses {important_sentences[0].lower()} "
+        if len(important_sentences) > 1:
+            summary += f"It also mentions {important_sentences[1].lower()} "
+        if len(important_sentences) > 2:
+            summary += f"Additionally, it covers {important_sentences[2].lower()}"
+        return summary
+    return "The document appears to be a legal text that could not be summarized effectively."
+
+SENTENCES_ERROR = "sentences must be a positive integer"
+
+def sentence_count(value):
+    # Extractive summary length from a request; None if it isn't a positive integer
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        return None
+    return count if count > 0 else None
+
+def statutes_result(text, model_name, semantic=False, found_statutes=None):
+    # Response body for one document, shared by /identify-statutes and
+    # /batch/identify-statutes; model_name is already validated
+    if model_name == "inlegalbert":
+        return {
+            "statutes": find_statutes(text, semantic, found_statutes),
+            "success": True,
+            "model_used": "InLegalBERT with rule-based extraction"
+        }
+    
+    # LED can't extract statutes itself; use semantic retrieval when
+    # the section embeddings have been built
+    if semantic_finder.available():
+        return {
+            "statutes": merge_statutes([], semantic_hits(text)) or get_default_statutes(),
+            "success": True,
+            "model_used": "InLegalBERT semantic retrieval"
+        }
     
-    # Mistral for generation tasks (as a fallback for tasks InLegalBERT can't do)
+    count_fallback("default_statutes")
+    return {
+        "statutes": get_default_statutes(),
+        "success": True,
+        "model_used": "Legal-LED with default statutes"
+    }
+
+def semantic_hits(text):
+    # Semantic retrieval is best effort: when it fails (e.g. stale section
+    # embeddings) the caller keeps its rule-based results
     try:
-        print("Loading Mistral model for generation tasks...")
-        tokenizers["mistral"] = AutoTokenizer.from_pretrained("mistralai/Mistral-7B-Instruct-v0.2")
-        # We don't load the model here to save memory, we'll use the API for this
-        print("Mistral tokenizer loaded successfully")
+        return semantic_finder.find(text)
     except Exception as e:
-        print(f"Error loading Mistral tokenizer: {str(e)}")
+        print(f"Semantic statute retrieval failed: {str(e)}")
+        count_fallback("semantic_error")
+        return []
+
+def find_statutes(text, semantic=False, found_statutes=None):
+    # Single pass over the text with the precompiled statute matcher, unless
+    # the incremental path already matched it chunk by chunk
+    if found_statutes is None:
+        with stage("statute_scan"):
+            found_statutes = match_statutes(text)
+    
+    # Attach real section titles from the statute index when it's built
+    statute_index = get_statute_index()
+    if statute_index is not None:
+        with stage("annotate"):
+            statute_index.annotate(found_statutes)
+    
+    # Text that never names an Act falls through to semantic retrieval
+    if (semantic or not found_statutes) and semantic_finder.available():
+        found_statutes = merge_statutes(found_statutes, semantic_hits(text))
+    
+    # If no statutes found, provide default ones
+    if not found_statutes:
+        count_fallback("default_statutes")
+        return get_default_statutes()
+    return found_statutes
+
+def rule_based_prediction(facts):
+    # Score weighted cues in one pass; the evidence spans drive the reasoning
+    with stage("cue_scan"):
+        scored = judgment_scorer.score(facts)
+    return describe_prediction(*scored)
+
+def describe_prediction(scores, evidence, contributions):
+    plaintiff_score, defendant_score = scores["plaintiff"], scores["defendant"]
+    
+    # Determine the likely outcome
+    if plaintiff_score > defendant_score:
+        outcome = "Plaintiff"
+        confidence = int(min(60 + (plaintiff_score - defendant_score) * 5, 95))
+        reasoning = judgment_scorer.reasons(contributions, "plaintiff")
+    elif defendant_score > plaintiff_score:
+        outcome = "Defendant"
+        confidence = int(min(60 + (defendant_score - plaintiff_score) * 5, 95))
+        reasoning = judgment_scorer.reasons(contributions, "defendant")
+    else:
+        outcome = "Uncertain"
+        confidence = 50
+        reasoning = [
+            "The facts present a balanced case without clear advantage",
+            "Both parties have potentially valid arguments",
+            "The outcome would likely depend on specific evidence and legal interpretation"
+        ]
+    
+    prediction = f"Prediction: {outcome} is likely to win\nConfidence: {confidence}%\nReasoning:\n"
+    for i, reason in enumerate(reasoning, 1):
+        prediction += f"{i}. {reason}\n"
+    return prediction, confidence, evidence
+
+# Request metrics and on-demand profiling. A request carrying
+# "X-Profile: cprofile" or "X-Profile: torch" is profiled when PROFILE_DIR is
+# set, subject to PROFILE_SAMPLE_RATE; the trace file name is returned in the
+# X-Profile-Trace header.
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 1.0))
+UNMETERED_PATHS = {"/metrics", "/health", "/health/serving"}
+# Model label values; anything else a client sends is reported as "other"
+METRIC_MODELS = ("inlegalbert", "legal-led")
+
+@app.before_request
+def start_request_metrics():
+    if request.path in UNMETERED_PATHS:
+        return
+    g.metrics_started = time.perf_counter()
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if request.is_json:
+        # Parsed once here; the views get Flask's cached result
+        data = request.get_json(silent=True)
+        model_name = data.get('model', 'inlegalbert') if isinstance(data, dict) else "none"
+    else:
+        model_name = request.args.get('model', 'inlegalbert' if request.method == 'POST' else "none")
+    if model_name not in METRIC_MODELS and model_name != "none":
+        model_name = "other"
+    bind_request(endpoint, model_name)
+    if request.is_json:
+        record_stage("parse", time.perf_counter() - g.metrics_started)
+
+    profile = request.headers.get('X-Profile')
+    if profile and PROFILE_DIR:
+        g.profiler = maybe_profile(profile, PROFILE_DIR, PROFILE_SAMPLE_RATE, endpoint.strip('/').replace('/', '-'))
 
-# Load models on startup
-load_models()
+@app.after_request
+def finish_request_metrics(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    profiler = g.pop('profiler', None)
+    endpoint, model_name = current_labels()
+    status = str(response.status_code)
+
+    def finish():
+        REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, model=model_name, status=status)
+        if profiler is not None:
+            print(f"Wrote {profiler.kind} profile to {profiler.stop()}")
+        unbind_request()
+
+    if profiler is not None:
+        response.headers['X-Profile-Trace'] = os.path.basename(profiler.path)
+    # Streamed bodies are produced after this hook returns
+    if response.is_streamed:
+        response.call_on_close(finish)
+    else:
+        finish()
+    return response
+
+@app.teardown_request
+def abandon_request_profile(error):
+    # after_request doesn't run on unhandled exceptions; don't leave the
+    # profiler running and holding the profiling slot
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
+metrics.gauge(
+    "legal_model_resident_bytes", "Tensor bytes held by each loaded model",
+    lambda: {(name,): s["resident_bytes"] for name, s in registry.status().items()}, ("model",)
+)
+metrics.gauge(
+    "legal_model_load_seconds", "Duration of each model's most recent load",
+    lambda: {(name,): s["load_seconds"] for name, s in registry.status().items()}, ("model",)
+)
+metrics.gauge(
+    "legal_model_loaded", "1 if the model is resident",
+    lambda: {(name,): int(s["state"] == "ready") for name, s in registry.status().items()}, ("model",)
+)
+metrics.gauge("legal_scheduler_queued_requests", "Legal-LED requests waiting for a batch",
+              lambda: led_scheduler.stats()["queued"])
+metrics.gauge(
+    "legal_scheduler_batches_total", "Legal-LED generate() batches run",
+    lambda: led_scheduler.stats()["batches"], kind="counter"
+)
+metrics.gauge(
+    "legal_result_cache_requests_total", "Result cache lookups by outcome",
+    lambda: {
+        (endpoint, outcome): count
+        for endpoint, counters in result_cache.stats()["endpoints"].items()
+        for outcome, count in counters.items()
+    },
+    ("endpoint", "outcome"), kind="counter"
+)
+metrics.gauge("legal_result_cache_bytes", "Bytes held by the in-memory result cache",
+              lambda: result_cache.stats()["bytes"])
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Extra /health sections added by the serving layer, name -> callable
+health_sections = {}
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "models_loaded": list(models.keys())})
+    return jsonify({
+        "status": "healthy",
+        "models_loaded": registry.loaded(),
+        "models": registry.status(),
+        "inference_backends": {"inlegalbert": BERT_BACKEND, "legal-led": LED_BACKEND},
+        "scheduler": led_scheduler.stats(),
+        "time_to_first_token": time_to_first_token.summary(),
+        "cache": result_cache.stats(),
+        "incremental": incremental.stats(),
+        **{name: collect() for name, collect in health_sections.items()}
+    })
 
 @app.route('/summarize', methods=['POST'])
+@cached_endpoint("summarize", "text", param_fields=("type", "mode", "sentences"), exact_text=True)
 def summarize():
     data = request.json
     if not data or 'text' not in data:
@@ -60,62 +469,76 @@ def summarize():
     text = data['text']
     model_name = data.get('model', 'inlegalbert')
     summary_type = data.get('type', 'abstractive')
+    mode = data.get('mode', 'single')
+    document_id = data.get('document_id')
     
     try:
-        # For InLegalBERT, we need to use a different approach since it's not a summarization model
+        # InLegalBERT isn't a summarization model, so rank sentences by embedding centrality
         if model_name == "inlegalbert":
-            # Extract key sentences using a rule-based approach
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            
-            # Filter for sentences that contain legal keywords
-            legal_keywords = ["court", "judge", "law", "legal", "plaintiff", "defendant", "petition", 
-                             "appeal", "judgment", "order", "section", "act", "statute", "evidence"]
-            
-            important_sentences = []
-            for sentence in sentences:
-                if any(keyword in sentence.lower() for keyword in legal_keywords):
-                    important_sentences.append(sentence)
-            
-            # If we have too few sentences, include more
-            if len(important_sentences) < 3 and len(sentences) > 3:
-                important_sentences = sentences[:3]
-            
-            # Combine the important sentences
-            if summary_type == "extractive":
-                summary = " ".join(important_sentences)
-            else:
-                # For abstractive, we'll use a rule-based approach to create a summary
-                if len(important_sentences) > 0:
-                    summary = f"This legal document discusses {important_sentences[0].lower()} "
-                    if len(important_sentences) > 1:
-                        summary += f"It also mentions {important_sentences[1].lower()} "
-                    if len(important_sentences) > 2:
-                        summary += f"Additionally, it covers {important_sentences[2].lower()}"
-                else:
-                    summary = "The document appears to be a legal text that could not be summarized effectively."
+            num_sentences = sentence_count(data.get('sentences', 5))
+            if num_sentences is None:
+                return jsonify({"error": SENTENCES_ERROR, "success": False}), 400
+            if document_id is not None:
+                # Only sentences of changed chunks are embedded again
+                document = incremental.prepare(str(document_id), text)
+                important_sentences = incremental.select_sentences(document, num_sentences)
+                return jsonify({
+                    "summary": inlegalbert_summary(text, summary_type, num_sentences, important_sentences),
+                    "success": True,
+                    "model_used": "InLegalBERT extractive",
+                    "incremental": document.diff
+                })
+
+            summary = inlegalbert_summary(text, summary_type, num_sentences)
             
             return jsonify({
                 "summary": summary,
                 "success": True,
-                "model_used": "InLegalBERT with rule-based extraction"
+                "model_used": "InLegalBERT extractive"
             })
         
         # For Legal-LED, use the model directly
-        elif model_name == "legal-led":
-            tokenizer = tokenizers[model_name]
-            model = models[model_name]
+        elif model_name == "legal-led" and mode == "map-reduce":
+            # Summarize overlapping windows, then summarize the summaries.
+            # With a document_id the map stage runs over content-defined
+            # chunks and reuses summaries of chunks that didn't change.
+            document = None
+            if document_id is not None:
+                document = incremental.prepare(str(document_id), text)
+                events = incremental.summarize(document, SUMMARY_GEN_KWARGS)
+            else:
+                events = map_reduce_summarizer.summarize(text, SUMMARY_GEN_KWARGS)
+            if data.get('stream'):
+                return Response(
+                    stream_with_context(stream_events(events, "Legal-LED map-reduce")),
+                    mimetype="text/event-stream"
+                )
+            final = [event for event in events if event["stage"] == "final"][-1]
             
-            inputs = tokenizer(text, return_tensors="pt", max_length=4096, truncation=True)
-            summary_ids = model.generate(
-                inputs["input_ids"],
-                max_length=250,
-                min_length=50,
-                length_penalty=2.0,
-                num_beams=4,
-                early_stopping=True
+            result = {
+                "summary": final["summary"],
+                "success": True,
+                "model_used": "Legal-LED map-reduce",
+                "chunks": final["chunks"],
+                "truncated": final["truncated"]
+            }
+            if document is not None:
+                result["incremental"] = document.diff
+            return jsonify(result)
+        
+        elif model_name == "legal-led" and data.get('stream'):
+            return Response(
+                stream_with_context(stream_tokens(
+                    text, SUMMARY_GEN_KWARGS, data.get('sample', False), "summary",
+                    {"success": True, "model_used": "Legal-LED"}, started=g.get('metrics_started')
+                )),
+                mimetype="text/event-stream"
             )
-            summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-            
+        
+        elif model_name == "legal-led":
+            # Queue the request on the micro-batching scheduler
+            summary = led_scheduler.generate(text, **SUMMARY_GEN_KWARGS)
+
             return jsonify({
                 "summary": summary,
                 "success": True,
@@ -127,10 +550,11 @@ def summarize():
     
     except Exception as e:
         print(f"Error in summarization: {str(e)}")
+        count_fallback("error")
         
         # Fallback to a simple extractive summary
         try:
-            sentences = re.split(r'(?<=[.!?])\s+', text)
+            sentences = SENTENCE_SPLIT_REGEX.split(text)
             summary = " ".join(sentences[:3])  # First 3 sentences
             
             return jsonify({
@@ -143,6 +567,8 @@ def summarize():
             return jsonify({"error": str(e), "success": False}), 500
 
 @app.route('/predict-judgment', methods=['POST'])
+# Evidence spans are offsets into the facts, so whitespace matters here
+@cached_endpoint("predict-judgment", "facts", exact_text=True)
 def predict_judgment():
     data = request.json
     if not data or 'facts' not in data:
@@ -154,68 +580,31 @@ def predict_judgment():
     try:
         # For InLegalBERT, we'll use a rule-based approach with legal terminology
         if model_name == "inlegalbert":
-            # Look for keywords that might indicate the outcome
-            plaintiff_keywords = ["rightful", "entitled", "valid claim", "evidence supports", "in accordance with law"]
-            defendant_keywords = ["no evidence", "insufficient", "lacks merit", "without basis", "contrary to law"]
-            
-            # Count occurrences of keywords
-            plaintiff_score = sum(facts.lower().count(keyword) for keyword in plaintiff_keywords)
-            defendant_score = sum(facts.lower().count(keyword) for keyword in defendant_keywords)
-            
-            # Determine the likely outcome
-            if plaintiff_score > defendant_score:
-                outcome = "Plaintiff"
-                confidence = min(60 + (plaintiff_score - defendant_score) * 5, 95)
-                reasoning = [
-                    "The facts contain language favorable to the plaintiff's position",
-                    "The case appears to have merit based on the presented facts",
-                    "Legal precedent typically supports similar claims"
-                ]
-            elif defendant_score > plaintiff_score:
-                outcome = "Defendant"
-                confidence = min(60 + (defendant_score - plaintiff_score) * 5, 95)
-                reasoning = [
-                    "The facts contain language that weakens the plaintiff's claim",
-                    "There appear to be deficiencies in the case as presented",
-                    "Similar cases have typically been decided in favor of defendants"
-                ]
-            else:
-                outcome = "Uncertain"
-                confidence = 50
-                reasoning = [
-                    "The facts present a balanced case without clear advantage",
-                    "Both parties have potentially valid arguments",
-                    "The outcome would likely depend on specific evidence and legal interpretation"
-                ]
-            
-            prediction = f"Prediction: {outcome} is likely to win\nConfidence: {confidence}%\nReasoning:\n"
-            for i, reason in enumerate(reasoning, 1):
-                prediction += f"{i}. {reason}\n"
+            prediction, confidence, evidence = rule_based_prediction(facts)
             
             return jsonify({
                 "prediction": prediction,
                 "confidence": confidence,
+                "evidence": evidence,
                 "success": True,
                 "model_used": "InLegalBERT with rule-based analysis"
             })
         
         # For Legal-LED, use a different approach
         elif model_name == "legal-led":
-            tokenizer = tokenizers[model_name]
-            model = models[model_name]
-            
             prompt = f"Predict judgment based on these facts: {facts}"
-            
-            inputs = tokenizer(prompt, return_tensors="pt", max_length=4096, truncation=True)
-            prediction_ids = model.generate(
-                inputs["input_ids"],
-                max_length=300,
-                min_length=100,
-                length_penalty=2.0,
-                num_beams=4,
-                early_stopping=True
-            )
-            prediction_text = tokenizer.decode(prediction_ids[0], skip_special_tokens=True)
+
+            if data.get('stream'):
+                return Response(
+                    stream_with_context(stream_tokens(
+                        prompt, PREDICTION_GEN_KWARGS, data.get('sample', False), "prediction",
+                        {"confidence": 75, "success": True, "model_used": "Legal-LED"},
+                        started=g.get('metrics_started')
+                    )),
+                    mimetype="text/event-stream"
+                )
+
+            prediction_text = led_scheduler.generate(prompt, **PREDICTION_GEN_KWARGS)
             
             # Extract confidence (simulated)
             confidence = 75
@@ -232,6 +621,7 @@ def predict_judgment():
     
     except Exception as e:
         print(f"Error in judgment prediction: {str(e)}")
+        count_fallback("error")
         
         # Fallback to a simple prediction
         try:
@@ -248,6 +638,7 @@ def predict_judgment():
             return jsonify({"error": str(e), "success": False}), 500
 
 @app.route('/identify-statutes', methods=['POST'])
+@cached_endpoint("identify-statutes", "text", param_fields=("semantic",), exact_text=True)
 def identify_statutes():
     data = request.json
     if not data or 'text' not in data:
@@ -258,80 +649,15 @@ def identify_statutes():
     
     try:
         # For InLegalBERT, we'll use a rule-based approach to identify Indian statutes
-        if model_name == "inlegalbert":
-            # Common Indian statutes and their patterns
-            statute_patterns = [
-                (r"Indian Penal Code|IPC|I\.P\.C\.", "Indian Penal Code"),
-                (r"Code of Criminal Procedure|CrPC|Cr\.P\.C\.", "Code of Criminal Procedure"),
-                (r"Code of Civil Procedure|CPC|C\.P\.C\.", "Code of Civil Procedure"),
-                (r"Constitution of India", "Constitution of India"),
-                (r"Indian Contract Act", "Indian Contract Act"),
-                (r"Indian Evidence Act", "Indian Evidence Act"),
-                (r"Companies Act", "Companies Act"),
-                (r"Income Tax Act", "Income Tax Act"),
-                (r"Goods and Services Tax|GST", "Goods and Services Tax Act"),
-                (r"Specific Relief Act", "Specific Relief Act"),
-                (r"Transfer of Property Act", "Transfer of Property Act"),
-                (r"Hindu Marriage Act", "Hindu Marriage Act"),
-                (r"Muslim Personal Law", "Muslim Personal Law"),
-                (r"Arbitration and Conciliation Act", "Arbitration and Conciliation Act"),
-                (r"Information Technology Act|IT Act", "Information Technology Act")
-            ]
-            
-            # Section pattern
-            section_pattern = r"[Ss]ection\s+(\d+[A-Za-z]*)(?:\s+of\s+the\s+([A-Za-z\s]+))?"
-            
-            # Find statutes mentioned in the text
-            found_statutes = []
-            for pattern, name in statute_patterns:
-                if re.search(pattern, text):
-                    # Look for sections related to this statute
-                    sections = []
-                    for match in re.finditer(section_pattern, text):
-                        section_num = match.group(1)
-                        statute_context = text[max(0, match.start() - 100):min(len(text), match.end() + 100)]
-                        if re.search(pattern, statute_context):
-                            sections.append(section_num)
-                    
-                    # If no specific sections found, just note the statute
-                    if not sections:
-                        found_statutes.append({
-                            "id": str(len(found_statutes) + 1),
-                            "name": name,
-                            "section": "General reference",
-                            "relevance": f"The document references the {name}"
-                        })
-                    else:
-                        # Add each section as a separate entry
-                        for section in sections:
-                            found_statutes.append({
-                                "id": str(len(found_statutes) + 1),
-                                "name": name,
-                                "section": f"Section {section}",
-                                "relevance": f"The document references Section {section} of the {name}"
-                            })
-            
-            # If no statutes found, provide default ones
-            if not found_statutes:
-                found_statutes = get_default_statutes()
-            
-            return jsonify({
-                "statutes": found_statutes,
-                "success": True,
-                "model_used": "InLegalBERT with rule-based extraction"
-            })
+        if model_name == "inlegalbert" and data.get('document_id') is not None:
+            # Only changed chunks are scanned again
+            document = incremental.prepare(str(data['document_id']), text)
+            result = statutes_result(text, model_name, data.get('semantic', False), incremental.statutes(document))
+            result["incremental"] = document.diff
+            return jsonify(result)
         
-        # For Legal-LED, use a different approach
-        elif model_name == "legal-led":
-            # For demonstration, we'll return mock statutes
-            # In a real app, you'd use the model to extract statutes
-            statutes = get_default_statutes()
-            
-            return jsonify({
-                "statutes": statutes,
-                "success": True,
-                "model_used": "Legal-LED with default statutes"
-            })
+        elif model_name in ("inlegalbert", "legal-led"):
+            return jsonify(statutes_result(text, model_name, data.get('semantic', False)))
         
         else:
             return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
@@ -363,6 +689,350 @@ def get_default_statutes():
         }
     ]
 
+@app.route('/statutes/search', methods=['GET'])
+def search_statutes():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter q is required", "success": False}), 400
+    
+    statute_index = get_statute_index()
+    if statute_index is None:
+        return jsonify({
+            "error": "Statute index has not been built, run build_statute_index.py",
+            "success": False
+        }), 503
+    
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer", "success": False}), 400
+    # A negative limit would slice results from the end
+    limit = max(1, min(limit, 100))
+    results = statute_index.search(query, limit=limit, statute=request.args.get('statute'))
+    return jsonify({"results": results, "success": True})
+
+# Largest number of documents accepted by one batch request
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 256))
+
+class BatchLineError:
+    # An NDJSON line that didn't parse; kept apart from client objects,
+    # which may have an "error" field of their own
+    def __init__(self, message):
+        self.message = message
+
+def read_batch_documents(field):
+    # Accept {"documents": [...], "model": ...} or an NDJSON body with one
+    # document object per line; bare strings are treated as the text field
+    if request.mimetype in ("application/x-ndjson", "application/ndjson"):
+        documents = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                documents.append(json.loads(line))
+            except ValueError as e:
+                documents.append(BatchLineError(f"Invalid JSON line: {str(e)}"))
+        model_name = request.args.get('model', 'inlegalbert')
+    else:
+        data = request.json or {}
+        documents = data.get('documents')
+        if not isinstance(documents, list):
+            return None, None, (jsonify({"error": "A list of documents is required", "success": False}), 400)
+        model_name = data.get('model', 'inlegalbert')
+    if len(documents) > BATCH_MAX_SIZE:
+        return None, None, (jsonify({
+            "error": f"Batch size {len(documents)} exceeds the limit of {BATCH_MAX_SIZE}",
+            "success": False
+        }), 413)
+    return [{field: doc} if isinstance(doc, str) else doc for doc in documents], model_name, None
+
+def validate_batch_item(doc, field, message):
+    if isinstance(doc, BatchLineError):
+        return doc.message
+    if not isinstance(doc, dict):
+        return "Each document must be a string or an object"
+    if not isinstance(doc.get(field), str):
+        return message
+    return None
+
+def ndjson_response(results):
+    # One JSON object per line, in input order
+    def generate():
+        for index, result in enumerate(results):
+            with stage("serialize"):
+                line = json.dumps({"index": index, **result}) + "\n"
+            yield line
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def run_batch(documents, field, message, rule_based=None, prompt=None, gen_kwargs=None, model_result=None,
+              prepare=None):
+    # Rule-based items run inline; model items are submitted to the Legal-LED
+    # scheduler together (submit_many) so they share batched tokenization and
+    # generate calls. prepare(valid_docs) does model work for all valid items
+    # at once, and rule_based(doc, prepared) then gets each item's share.
+    errors = [validate_batch_item(doc, field, message) for doc in documents]
+    if rule_based is not None:
+        prepared = {}
+        if prepare is not None:
+            valid = [i for i, error in enumerate(errors) if not error]
+            try:
+                prepared = dict(zip(valid, prepare([documents[i] for i in valid])))
+            except Exception as e:
+                errors = [error or str(e) for error in errors]
+        for index, (doc, error) in enumerate(zip(documents, errors)):
+            if error:
+                yield {"error": error, "success": False}
+                continue
+            try:
+                yield rule_based(doc, prepared.get(index)) if prepare is not None else rule_based(doc)
+            except Exception as e:
+                yield {"error": str(e), "success": False}
+        return
+
+    valid = [i for i, error in enumerate(errors) if not error]
+    futures = {}
+    try:
+        submitted = led_scheduler.submit_many([prompt(documents[i][field]) for i in valid], **gen_kwargs)
+        futures = dict(zip(valid, submitted))
+    except Exception as e:
+        errors = [error or str(e) for error in errors]
+    for index, error in enumerate(errors):
+        if error:
+            yield {"error": error, "success": False}
+            continue
+        try:
+            yield model_result(futures[index].result())
+        except Exception as e:
+            yield {"error": str(e), "success": False}
+
+@app.route('/batch/summarize', methods=['POST'])
+def batch_summarize():
+    documents, model_name, error = read_batch_documents('text')
+    if error:
+        return error
+    if model_name == "inlegalbert":
+        def select_all(docs):
+            # Sentences of every document are embedded together; an item with
+            # a bad sentence count is skipped here and fails on its own below
+            counts = [sentence_count(doc.get('sentences', 5)) for doc in docs]
+            return extractive_summarizer.select_many([doc['text'] for doc in docs], counts)
+
+        def summarize_item(doc, sentences):
+            num_sentences = sentence_count(doc.get('sentences', 5))
+            if num_sentences is None:
+                return {"error": SENTENCES_ERROR, "success": False}
+            return {
+                "summary": inlegalbert_summary(doc['text'], doc.get('type', 'abstractive'), num_sentences, sentences),
+                "success": True,
+                "model_used": "InLegalBERT extractive"
+            }
+
+        results = run_batch(documents, 'text', "Text is required", summarize_item, prepare=select_all)
+    elif model_name == "legal-led":
+        results = run_batch(
+            documents, 'text', "Text is required",
+            prompt=lambda text: text,
+            gen_kwargs=SUMMARY_GEN_KWARGS,
+            model_result=lambda summary: {"summary": summary, "success": True, "model_used": "Legal-LED"}
+        )
+    else:
+        return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
+    return ndjson_response(results)
+
+@app.route('/batch/predict-judgment', methods=['POST'])
+def batch_predict_judgment():
+    documents, model_name, error = read_batch_documents('facts')
+    if error:
+        return error
+    if model_name == "inlegalbert":
+        def predict(doc):
+            prediction, confidence, evidence = rule_based_prediction(doc['facts'])
+            return {
+                "prediction": prediction,
+                "confidence": confidence,
+                "evidence": evidence,
+                "success": True,
+                "model_used": "InLegalBERT with rule-based analysis"
+            }
+        results = run_batch(documents, 'facts', "Case facts are required", predict)
+    elif model_name == "legal-led":
+        results = run_batch(
+            documents, 'facts', "Case facts are required",
+            prompt=lambda facts: f"Predict judgment based on these facts: {facts}",
+            gen_kwargs=PREDICTION_GEN_KWARGS,
+            model_result=lambda prediction: {
+                "prediction": prediction, "confidence": 75, "success": True, "model_used": "Legal-LED"
+            }
+        )
+    else:
+        return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
+    return ndjson_response(results)
+
+@app.route('/batch/identify-statutes', methods=['POST'])
+def batch_identify_statutes():
+    documents, model_name, error = read_batch_documents('text')
+    if error:
+        return error
+    if model_name in ("inlegalbert", "legal-led"):
+        results = run_batch(documents, 'text', "Text is required",
+                            lambda doc: statutes_result(doc['text'], model_name, doc.get('semantic', False)))
+    else:
+        return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
+    return ndjson_response(results)
+
+# Uploads: a multipart "file" field or the raw request body (plain text or
+# PDF, chunked transfer allowed). The body is spooled to a temp file and read
+# through mmap in chunks, so large documents are never held in memory whole.
+INGEST_MAX_BYTES = int(os.environ.get('INGEST_MAX_BYTES', 1024 * 1024 * 1024))
+INGEST_SPOOL_BYTES = int(os.environ.get('INGEST_SPOOL_BYTES', 8 * 1024 * 1024))
+# Text summarized from an upload; the models only see a bounded prefix anyway
+INGEST_SUMMARY_CHARS = int(os.environ.get('INGEST_SUMMARY_CHARS', 1024 * 1024))
+
+def request_files():
+    # (files, form, error response) of a multipart upload. A chunked body has
+    # no Content-Length for the check in open_upload(), so it's parsed from a
+    # stream that stops at INGEST_MAX_BYTES.
+    if request.content_length:
+        return request.files, request.form, None
+    parser = FormDataParser(silent=False)
+    try:
+        _, form, files = parser.parse(CappedStream(request.stream, INGEST_MAX_BYTES), request.mimetype,
+                                      None, request.mimetype_params)
+    except UploadTooLarge:
+        return None, None, (jsonify({
+            "error": f"Upload exceeds the limit of {INGEST_MAX_BYTES} bytes", "success": False
+        }), 413)
+    except ValueError as e:
+        # Werkzeug raises ValueError for a malformed multipart body
+        return None, None, (jsonify({"error": f"Invalid multipart upload: {str(e)}", "success": False}), 400)
+    return files, form, None
+
+def open_upload():
+    # Returns (document, params, error response)
+    if request.content_length and request.content_length > INGEST_MAX_BYTES:
+        return None, None, (jsonify({
+            "error": f"Upload exceeds the limit of {INGEST_MAX_BYTES} bytes", "success": False
+        }), 413)
+    if request.mimetype == "multipart/form-data":
+        # Werkzeug already streams large multipart files to a temp file
+        files, form, error = request_files()
+        if error:
+            return None, None, error
+        upload = files.get('file')
+        if upload is None:
+            return None, None, (jsonify({"error": "A file field is required", "success": False}), 400)
+        is_pdf = upload.mimetype == "application/pdf" or (upload.filename or "").lower().endswith(".pdf")
+        return MappedDocument(upload.stream, "pdf" if is_pdf else "text"), form, None
+    try:
+        spooled = spool_stream(request.stream, INGEST_MAX_BYTES, INGEST_SPOOL_BYTES)
+    except UploadTooLarge as e:
+        return None, None, (jsonify({"error": str(e), "success": False}), 413)
+    kind = "pdf" if request.mimetype == "application/pdf" else "text"
+    return MappedDocument(spooled, kind), request.args, None
+
+def upload_endpoint(view):
+    # Open the upload, hand it to the view and always release the temp file
+    @wraps(view)
+    def wrapper():
+        document, params, error = open_upload()
+        if error:
+            return error
+        try:
+            with document:
+                return view(document, params)
+        except Exception as e:
+            print(f"Error processing upload: {str(e)}")
+            return jsonify({"error": str(e), "success": False}), 500
+    return wrapper
+
+@app.route('/upload/identify-statutes', methods=['POST'])
+@upload_endpoint
+def upload_identify_statutes(document, params):
+    # One pass over the mapped text; repeated citations are aggregated with
+    # an occurrence count so the result stays small for huge bundles
+    with stage("statute_scan"):
+        found_statutes = match_statutes_stream(document.chunks())
+    statute_index = get_statute_index()
+    if statute_index is not None:
+        statute_index.annotate(found_statutes)
+    if not found_statutes:
+        count_fallback("default_statutes")
+        found_statutes = get_default_statutes()
+    return jsonify({
+        "statutes": found_statutes,
+        "success": True,
+        "model_used": "InLegalBERT with rule-based extraction",
+        "bytes": document.size
+    })
+
+@app.route('/upload/predict-judgment', methods=['POST'])
+@upload_endpoint
+def upload_predict_judgment(document, params):
+    model_name = params.get('model', 'inlegalbert')
+    if model_name == "inlegalbert":
+        # Cue scoring runs block by block, cut on sentence boundaries
+        with stage("cue_scan"):
+            scored = judgment_scorer.score_blocks(iter_sentence_blocks(document.chunks()))
+        prediction, confidence, evidence = describe_prediction(*scored)
+        return jsonify({
+            "prediction": prediction,
+            "confidence": confidence,
+            "evidence": evidence,
+            "success": True,
+            "model_used": "InLegalBERT with rule-based analysis"
+        })
+    elif model_name == "legal-led":
+        facts, truncated = read_prefix(document.chunks(), INGEST_SUMMARY_CHARS)
+        prediction_text = led_scheduler.generate(f"Predict judgment based on these facts: {facts}", **PREDICTION_GEN_KWARGS)
+        return jsonify({
+            "prediction": prediction_text,
+            "confidence": 75,
+            "success": True,
+            "model_used": "Legal-LED",
+            "truncated": truncated
+        })
+    return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
+
+@app.route('/upload/summarize', methods=['POST'])
+@upload_endpoint
+def upload_summarize(document, params):
+    model_name = params.get('model', 'inlegalbert')
+    if model_name == "inlegalbert":
+        num_sentences = sentence_count(params.get('sentences', 5))
+        if num_sentences is None:
+            return jsonify({"error": SENTENCES_ERROR, "success": False}), 400
+        # Sentences are ranked a block at a time, up to the extractive
+        # summarizer's sentence and time limits
+        important_sentences, truncated = extractive_summarizer.select_stream(
+            iter_sentences(document.chunks()), num_sentences
+        )
+        return jsonify({
+            "summary": inlegalbert_summary("", params.get('type', 'abstractive'), num_sentences, important_sentences),
+            "success": True,
+            "model_used": "InLegalBERT extractive",
+            "truncated": truncated
+        })
+    
+    # Legal-LED reads a bounded window anyway, so it gets a prefix
+    text, truncated = read_prefix(document.chunks(), INGEST_SUMMARY_CHARS)
+    if model_name == "legal-led" and params.get('mode') == "map-reduce":
+        final = [e for e in map_reduce_summarizer.summarize(text, SUMMARY_GEN_KWARGS) if e["stage"] == "final"][-1]
+        summary, truncated = final["summary"], truncated or final["truncated"]
+        model_used = "Legal-LED map-reduce"
+    elif model_name == "legal-led":
+        summary = led_scheduler.generate(text, **SUMMARY_GEN_KWARGS)
+        model_used = "Legal-LED"
+    else:
+        return jsonify({"error": f"Model {model_name} not supported", "success": False}), 400
+    return jsonify({
+        "summary": summary,
+        "success": True,
+        "model_used": model_used,
+        "truncated": truncated
+    })
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    # Development server only; the reloader would load every model twice, so
+    # debug mode is opt-in. Use serve.py for production.
+    app.run(host='0.0.0.0', port=port, debug=os.environ.get('FLASK_DEBUG') == '1')
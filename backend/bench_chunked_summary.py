@@ -0,0 +1,87 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+from bench_statute_matcher import make_document
+from inference_scheduler import GenerationScheduler
+from summarization import MapReduceSummarizer
+
+GEN_KWARGS = dict(max_length=250, min_length=50, length_penalty=2.0, num_beams=4, early_stopping=True)
+
+
+def make_long_document(tokenizer, tokens):
+    # Grow the synthetic judgment until it reaches the requested token count
+    size = tokens * 4
+    while True:
+        text = make_document(size)
+        if len(tokenizer(text, add_special_tokens=False)["input_ids"]) >= tokens:
+            return text
+        size *= 2
+
+
+def run_mode(args):
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model)
+    model.eval()
+    text = make_long_document(tokenizer, args.tokens)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    if args.mode == "single":
+        # The original path: truncate at 4096 tokens and run one generate
+        inputs = tokenizer(text, return_tensors="pt", max_length=4096, truncation=True)
+        with torch.no_grad():
+            summary_ids = model.generate(inputs["input_ids"], **GEN_KWARGS)
+        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+        chunks = 1
+    else:
+        scheduler = GenerationScheduler(lambda: (model, tokenizer), max_batch_size=args.max_batch_size)
+        summarizer = MapReduceSummarizer(scheduler, lambda: (model, tokenizer), window=args.window,
+                                         max_chunks=args.max_chunks, time_limit=args.time_limit)
+        final = [e for e in summarizer.summarize(text, GEN_KWARGS) if e["stage"] == "final"][-1]
+        summary, chunks = final["summary"], final["chunks"]
+        scheduler.stop()
+    elapsed = time.perf_counter() - started
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "mode": args.mode,
+        "seconds": round(elapsed, 2),
+        "chunks": chunks,
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "inference_rss_mb": round((peak_rss - baseline_rss) / 1024, 1),
+        "summary_chars": len(summary),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-pass truncation with map-reduce summarization")
+    parser.add_argument("--model", default="nsi319/legal-led-base-16384")
+    parser.add_argument("--tokens", type=int, default=50000)
+    parser.add_argument("--window", type=int, default=4096)
+    parser.add_argument("--max-chunks", type=int, default=32)
+    parser.add_argument("--max-batch-size", type=int, default=4)
+    parser.add_argument("--time-limit", type=float, default=3600)
+    parser.add_argument("--mode", choices=["single", "map-reduce"],
+                        help="Run one mode in this process (used internally)")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    # Each mode runs in its own process so peak RSS is measured independently
+    for mode in ("single", "map-reduce"):
+        cmd = [sys.executable, __file__, "--mode", mode] + sys.argv[1:]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        print(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# The suite runs offline against stand-in models; fail fast instead of
+# downloading anything, and don't load the real models at import
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ["MODEL_WARMUP"] = ""
+
+import torch  # noqa: E402
+from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers  # noqa: E402
+from transformers import (  # noqa: E402
+    BertConfig, BertForMaskedLM, LEDConfig, LEDForConditionalGeneration, PreTrainedTokenizerFast
+)
+
+import app as backend  # noqa: E402
+from bench_judgment_scorer import make_facts  # noqa: E402
+from bench_statute_matcher import make_document, parse_size  # noqa: E402
+from inference_backends import optimize_model  # noqa: E402
+from load_generator import PAYLOAD_FIELDS, percentile  # noqa: E402
+from metrics import resident_memory_bytes  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baselines", "baseline.json")
+
+# (endpoint, model, extra request fields) for every branch worth timing
+CASES = {
+    "summarize/inlegalbert-extractive": ("summarize", "inlegalbert", {"type": "extractive"}),
+    "summarize/inlegalbert-abstractive": ("summarize", "inlegalbert", {"type": "abstractive"}),
+    "summarize/legal-led": ("summarize", "legal-led", {}),
+    "summarize/legal-led-map-reduce": ("summarize", "legal-led", {"mode": "map-reduce"}),
+    "predict-judgment/inlegalbert": ("predict-judgment", "inlegalbert", {}),
+    "predict-judgment/legal-led": ("predict-judgment", "legal-led", {}),
+    "identify-statutes/inlegalbert": ("identify-statutes", "inlegalbert", {}),
+    "identify-statutes/legal-led": ("identify-statutes", "legal-led", {}),
+}
+
+# Lower is better for everything except throughput
+HIGHER_IS_BETTER = {"throughput_rps"}
+DEFAULT_COMPARE_METRICS = ["p50_ms", "p99_ms", "throughput_rps", "peak_rss_mb"]
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+
+
+def build_tokenizer(corpus, vocab_size):
+    # Word-level vocabulary trained on the synthetic corpus. Special token
+    # ids match LED's defaults: <s>=0, <pad>=1, </s>=2.
+    tokenizer = Tokenizer(models.WordLevel(unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(corpus, trainers.WordLevelTrainer(vocab_size=vocab_size, special_tokens=SPECIAL_TOKENS))
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="<s> $A </s>", pair="<s> $A </s> </s> $B </s>", special_tokens=[("<s>", 0), ("</s>", 2)]
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="<pad>",
+        unk_token="<unk>", mask_token="<mask>", cls_token="<s>", sep_token="</s>"
+    )
+
+
+def standin_models(args):
+    """Tiny randomly initialized LED and BERT models with the production
+    architectures, sharing one tokenizer. Seeded so every run builds the
+    same weights."""
+    corpus = [make_document(20000, seed=i) for i in range(8)] + [make_facts(20000, seed=i) for i in range(8)]
+    tokenizer = build_tokenizer(corpus, args.vocab_size)
+    torch.manual_seed(0)
+    led = LEDForConditionalGeneration(LEDConfig(
+        vocab_size=len(tokenizer), d_model=args.hidden_size,
+        encoder_layers=args.layers, decoder_layers=args.layers,
+        encoder_attention_heads=2, decoder_attention_heads=2,
+        encoder_ffn_dim=2 * args.hidden_size, decoder_ffn_dim=2 * args.hidden_size,
+        # The app truncates LED input at 4096 tokens
+        max_encoder_position_embeddings=4096, max_decoder_position_embeddings=512,
+        attention_window=[64] * args.layers,
+        pad_token_id=1, bos_token_id=0, eos_token_id=2, decoder_start_token_id=2,
+    ))
+    bert = BertForMaskedLM(BertConfig(
+        vocab_size=len(tokenizer), hidden_size=args.hidden_size, num_hidden_layers=args.layers,
+        num_attention_heads=2, intermediate_size=2 * args.hidden_size, max_position_embeddings=512,
+        pad_token_id=1,
+    ))
+    led.eval()
+    bert.eval()
+    return tokenizer, led, bert
+
+
+def install_standins(args):
+    tokenizer, led, bert = standin_models(args)
+    # Same optimization step as the real loaders so INFERENCE_BACKEND is benchmarked too
+    led = optimize_model(led, backend.LED_BACKEND)
+    bert = optimize_model(bert, backend.BERT_BACKEND)
+    backend.registry.register("legal-led", lambda: {"model": led, "tokenizer": tokenizer})
+    backend.registry.register("inlegalbert", lambda: {"model": bert, "tokenizer": tokenizer})
+    # Section embeddings built with the real InLegalBERT don't match the
+    # stand-in's hidden size, so keep semantic retrieval out of the runs
+    backend.semantic_finder.available = lambda: False
+
+
+def make_payloads(endpoint, size, count):
+    field = PAYLOAD_FIELDS[endpoint]
+    make = make_facts if field == "facts" else make_document
+    return [make(size, seed=i) for i in range(count)]
+
+
+class PeakRSS:
+    # Samples RSS in the background while a case runs
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = resident_memory_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, resident_memory_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, resident_memory_bytes())
+        return False
+
+
+def run_case(name, size, args):
+    endpoint, model_name, extra = CASES[name]
+    field = PAYLOAD_FIELDS[endpoint]
+    documents = make_payloads(endpoint, size, args.documents)
+
+    def call(i):
+        body = {field: documents[i % len(documents)], "model": model_name, "cache": False, **extra}
+        started = time.perf_counter()
+        response = backend.app.test_client().post(f"/{endpoint}", json=body)
+        elapsed = time.perf_counter() - started
+        result = response.get_json(silent=True) or {}
+        # A fallback answer is a failure of the branch being measured
+        ok = response.status_code == 200 and result.get("success") and "note" not in result
+        return elapsed, ok
+
+    for i in range(args.warmup):
+        call(i)
+
+    rss_before = resident_memory_bytes()
+    with PeakRSS() as rss:
+        started = time.perf_counter()
+        if args.concurrency > 1:
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                results = list(pool.map(call, range(args.iterations)))
+        else:
+            results = [call(i) for i in range(args.iterations)]
+        wall = time.perf_counter() - started
+
+    latencies = [elapsed for elapsed, _ in results]
+    return {
+        "endpoint": endpoint,
+        "model": model_name,
+        "size_bytes": size,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "errors": sum(1 for _, ok in results if not ok),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 2),
+        "p90_ms": round(1000 * percentile(latencies, 0.90), 2),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 2),
+        "throughput_rps": round(len(latencies) / wall, 3),
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+        "rss_growth_mb": round((rss.peak - rss_before) / 2 ** 20, 1),
+    }
+
+
+def run(args):
+    install_standins(args)
+    cases = args.cases or list(CASES)
+    results = {}
+    print(f"{'case':<40} {'size':>7} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'peak MB':>8} {'errors':>6}")
+    for name in cases:
+        for label in args.sizes:
+            key = f"{name}/{label}"
+            result = run_case(name, parse_size(label), args)
+            results[key] = result
+            print(f"{name:<40} {label:>7} {result['p50_ms']:9.1f} {result['p99_ms']:9.1f} "
+                  f"{result['throughput_rps']:8.2f} {result['peak_rss_mb']:8.1f} {result['errors']:>6}")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "torch_threads": torch.get_num_threads(),
+            "inference_backends": {"inlegalbert": backend.BERT_BACKEND, "legal-led": backend.LED_BACKEND},
+        },
+        "settings": {
+            "hidden_size": args.hidden_size,
+            "layers": args.layers,
+            "vocab_size": args.vocab_size,
+            "warmup": args.warmup,
+        },
+        "models": backend.registry.status(),
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    backend.led_scheduler.stop()
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':<48} {'metric':>14} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key in sorted(set(baseline) & set(current)):
+        if current[key]["errors"] > baseline[key]["errors"]:
+            regressions += 1
+            print(f"{key:<48} {'errors':>14} {baseline[key]['errors']:>10} {current[key]['errors']:>10}  REGRESSION")
+        for metric in args.metrics:
+            before, after = baseline[key].get(metric), current[key].get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            if worse > args.threshold:
+                regressions += 1
+                flag = "  REGRESSION"
+            elif worse < -args.threshold:
+                flag = "  improved"
+            print(f"{key:<48} {metric:>14} {before:10.2f} {after:10.2f} {100 * change:+7.1f}%{flag}")
+    for key in sorted(set(baseline) - set(current)):
+        print(f"{key}: missing from current run")
+    for key in sorted(set(current) - set(baseline)):
+        print(f"{key}: new, no baseline")
+
+    print(f"{regressions} regression(s) above {100 * args.threshold:.0f}%")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline endpoint benchmarks with stand-in models, and regression checks against a baseline"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark every endpoint and model branch")
+    run_parser.add_argument("--output", default=DEFAULT_BASELINE)
+    run_parser.add_argument("--cases", nargs="+", choices=sorted(CASES), help="Subset of cases (default: all)")
+    run_parser.add_argument("--sizes", nargs="+", default=["2KB", "20KB", "200KB"])
+    run_parser.add_argument("--iterations", type=int, default=10)
+    run_parser.add_argument("--warmup", type=int, default=1, help="Untimed requests per case, including model load")
+    run_parser.add_argument("--concurrency", type=int, default=1)
+    run_parser.add_argument("--documents", type=int, default=4, help="Distinct documents per case")
+    run_parser.add_argument("--hidden-size", type=int, default=64)
+    run_parser.add_argument("--layers", type=int, default=2)
+    run_parser.add_argument("--vocab-size", type=int, default=8000)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="Relative change that counts (0.10 = 10%%)")
+    compare_parser.add_argument("--metrics", nargs="+", default=DEFAULT_COMPARE_METRICS)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
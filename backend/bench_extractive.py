@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import torch
+from transformers import AutoTokenizer, AutoModelForMaskedLM
+
+from bench_statute_matcher import make_document
+from extractive import embed_sentences, mmr_select, split_sentences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure InLegalBERT extractive summarizer throughput")
+    parser.add_argument("--model", default="law-ai/InLegalBERT")
+    parser.add_argument("--sentences", type=int, default=512)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32, 64])
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    print(f"Loading {args.model}...")
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForMaskedLM.from_pretrained(args.model)
+    model.eval()
+
+    sentences = []
+    size = args.sentences * 80
+    while len(sentences) < args.sentences:
+        sentences = split_sentences(make_document(size))
+        size *= 2
+    sentences = sentences[:args.sentences]
+
+    # Warm up so the first measured batch size doesn't pay one-off costs
+    embed_sentences(model, tokenizer, sentences[:8], batch_size=8, max_length=args.max_length)
+
+    print(f"{'batch':>6} {'seconds':>9} {'sent/s':>9} {'mmr (ms)':>9}")
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        embeddings = embed_sentences(model, tokenizer, sentences, batch_size=batch_size, max_length=args.max_length)
+        elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        mmr_select(embeddings, 5)
+        mmr_ms = 1000 * (time.perf_counter() - start)
+        print(f"{batch_size:>6} {elapsed:9.2f} {len(sentences) / elapsed:9.1f} {mmr_ms:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
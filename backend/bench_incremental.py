@@ -0,0 +1,97 @@
+import argparse
+import random
+import statistics
+import time
+
+# Sets the offline environment before the app is imported
+from bench_endpoints import install_standins
+import app as backend  # noqa: E402
+from bench_statute_matcher import make_document, parse_size
+from extractive import SENTENCE_SPLIT_REGEX
+
+# (endpoint, extra request fields, whether the incremental result must equal a full recompute)
+CASES = {
+    "identify-statutes/inlegalbert": ("identify-statutes", {"model": "inlegalbert"}, True),
+    "summarize/inlegalbert-extractive": ("summarize", {"model": "inlegalbert", "type": "extractive"}, True),
+    # Map windows are packed from content-defined chunks instead of cut at
+    # fixed token offsets, so the summary text differs from a full run
+    "summarize/legal-led-map-reduce": ("summarize", {"model": "legal-led", "mode": "map-reduce"}, False),
+}
+
+EDIT = ("The learned counsel for the appellant drew our attention to a further line of authority "
+        "and submitted that the High Court had not considered the evidence of the second witness. ")
+
+
+def edit_paragraph(text, rng):
+    # Insert a paragraph at a random sentence break away from the ends
+    breaks = [match.end() for match in SENTENCE_SPLIT_REGEX.finditer(text)]
+    margin = len(breaks) // 10
+    cut = rng.choice(breaks[margin:len(breaks) - margin] or breaks)
+    return text[:cut] + EDIT + text[cut:]
+
+
+def timed_post(client, endpoint, payload):
+    started = time.perf_counter()
+    response = client.post(f"/{endpoint}", json=payload)
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(f"/{endpoint} returned {response.status_code}: {response.get_data(as_text=True)}")
+    return response.get_json(), elapsed * 1000
+
+
+def run_case(client, name, size, args):
+    endpoint, fields, exact = CASES[name]
+    rng = random.Random(args.seed)
+    text = make_document(size, seed=args.seed)
+    document_id = f"{name}-{size}"
+
+    # First version populates the chunk memo; not timed
+    timed_post(client, endpoint, dict(fields, text=text, document_id=document_id))
+
+    full, incremental, changed, mismatches = [], [], [], 0
+    for _ in range(args.edits):
+        text = edit_paragraph(text, rng)
+        full_result, full_ms = timed_post(client, endpoint, dict(fields, text=text, cache=False))
+        result, incremental_ms = timed_post(client, endpoint, dict(fields, text=text, document_id=document_id))
+        full.append(full_ms)
+        incremental.append(incremental_ms)
+        changed.append(result["incremental"]["changed"])
+        field = "statutes" if endpoint == "identify-statutes" else "summary"
+        if exact and result[field] != full_result[field]:
+            mismatches += 1
+
+    full_ms, incremental_ms = statistics.median(full), statistics.median(incremental)
+    print(f"{name:<36} {size:>9} chars  {result['incremental']['chunks']:>4} chunks  "
+          f"{statistics.mean(changed):4.1f} changed  full {full_ms:9.1f} ms  incremental {incremental_ms:9.1f} ms  "
+          f"speedup {full_ms / incremental_ms:5.1f}x" + (f"  {mismatches} MISMATCHED" if mismatches else ""))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Latency of re-analysing a long document after a one-paragraph edit, "
+                    "incremental (document_id) vs full recompute, with stand-in models"
+    )
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    # Map-reduce stops at LED_MAX_CHUNKS, so on long documents it only
+    # covers the truncated prefix
+    parser.add_argument("--sizes", nargs="+", default=["100KB", "1MB"])
+    parser.add_argument("--edits", type=int, default=5, help="Successive one-paragraph edits per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--vocab-size", type=int, default=8000)
+    args = parser.parse_args()
+
+    install_standins(args)
+    client = backend.app.test_client()
+    mismatches = 0
+    for name in args.cases:
+        for size in args.sizes:
+            mismatches += run_case(client, name, parse_size(size), args)
+    if mismatches:
+        print(f"{mismatches} incremental result(s) differed from the full recompute")
+
+
+if __name__ == "__main__":
+    main()
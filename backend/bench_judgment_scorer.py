@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+from bench_statute_matcher import make_document, parse_size
+from judgment_scorer import JudgmentScorer
+
+# The original keyword lists from predict_judgment(), kept for comparison
+PLAINTIFF_KEYWORDS = ["rightful", "entitled", "valid claim", "evidence supports", "in accordance with law"]
+DEFENDANT_KEYWORDS = ["no evidence", "insufficient", "lacks merit", "without basis", "contrary to law"]
+
+CUE_SENTENCES = [
+    "The plaintiff is entitled to damages for breach of contract.",
+    "The defendant failed to deliver the goods and there is no evidence of force majeure.",
+    "The claim is not time-barred and the evidence supports the plaintiff.",
+    "The suit lacks merit and is barred by limitation.",
+]
+
+
+def legacy_scores(facts):
+    plaintiff_score = sum(facts.lower().count(keyword) for keyword in PLAINTIFF_KEYWORDS)
+    defendant_score = sum(facts.lower().count(keyword) for keyword in DEFENDANT_KEYWORDS)
+    return plaintiff_score, defendant_score
+
+
+def all_cue_counts(scorer, facts):
+    # The legacy approach applied to every cue phrase and negation word
+    text = facts.lower()
+    return [text.count(word) for word in set(scorer._literal) | scorer.negations]
+
+
+def make_facts(size, seed=0):
+    # Synthetic judgment text with outcome cues sprinkled in
+    rng = random.Random(seed)
+    parts = []
+    for sentence in make_document(size, seed=seed).split(". "):
+        parts.append(sentence)
+        if rng.random() < 0.1:
+            parts.append(rng.choice(CUE_SENTENCES).rstrip("."))
+    return ". ".join(parts)[:size]
+
+
+def best_of(func, facts, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(facts)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return 1000 * best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the judgment cue scorer on large fact sheets")
+    parser.add_argument("--sizes", nargs="+", default=["10KB", "100KB", "1MB"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    scorer = JudgmentScorer.from_file()
+    print(f"{'size':>8} {'legacy (ms)':>12} {'all cues (ms)':>14} {'scorer (ms)':>12} {'cues':>6} {'matches':>8}")
+    for label in args.sizes:
+        facts = make_facts(parse_size(label))
+        legacy = best_of(legacy_scores, facts, args.repeat)
+        counted = best_of(lambda text: all_cue_counts(scorer, text), facts, args.repeat)
+        scored = best_of(scorer.score, facts, args.repeat)
+        _, evidence, contributions = scorer.score(facts)
+        matches = int(sum(contributions.values()))
+        print(f"{label:>8} {legacy:12.2f} {counted:14.2f} {scored:12.2f} {len(scorer.cues):>6} {matches:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from bench_judgment_scorer import make_facts
+from bench_statute_matcher import make_document
+from load_generator import PAYLOAD_FIELDS, percentile
+from metrics import process_memory
+
+MODELS = ["inlegalbert", "legal-led"]
+
+
+def run_server(args):
+    # Runs inside the launched server processes
+    os.environ["MODEL_WARMUP"] = ""
+    import torch
+    if args.mode == "prefork":
+        # Stand-ins are built in the master before fork(); keep torch on one
+        # thread until the workers set their own count (see prefork.main)
+        torch.set_num_threads(1)
+    if args.standins:
+        from bench_endpoints import install_standins
+        install_standins(args)
+    import app as backend
+
+    if args.mode == "prefork":
+        import prefork
+        prefork.main()
+    else:
+        import serve
+        import uvicorn
+        backend.registry.warm_up(MODELS)
+        uvicorn.run(serve.asgi_app, host="127.0.0.1", port=int(os.environ["PORT"]), log_level="warning")
+
+
+def get_json(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def launch(args, mode, port, env):
+    command = [sys.executable, os.path.abspath(__file__), "serve", mode,
+               "--hidden-size", str(args.hidden_size), "--layers", str(args.layers),
+               "--vocab-size", str(args.vocab_size), "--standins" if args.standins else "--no-standins"]
+    output = None if args.verbose else subprocess.DEVNULL
+    return subprocess.Popen(command, env=dict(os.environ, PORT=str(port), **env), stdout=output, stderr=output)
+
+
+def wait_ready(url, timeout, ready=lambda health: True):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            health = get_json(f"{url}/health")
+            if ready(health):
+                return health
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not become ready in {timeout:.0f}s (rerun with --verbose to see its output)")
+
+
+def stop(processes):
+    for process in processes:
+        process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def drive_load(urls, args):
+    field = PAYLOAD_FIELDS[args.endpoint]
+    make = make_facts if field == "facts" else make_document
+    documents = [make(args.doc_size, seed=i) for i in range(16)]
+
+    def post(i):
+        body = json.dumps({field: documents[i % len(documents)], "model": args.model, "cache": False}).encode()
+        request = urllib.request.Request(f"{urls[i % len(urls)]}/{args.endpoint}", data=body,
+                                         headers={"Content-Type": "application/json"})
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    # Untimed requests so every process has run each model once
+    for i in range(args.warmup * len(urls)):
+        post(i)
+
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client(worker):
+        nonlocal errors
+        i = worker
+        while time.perf_counter() < deadline:
+            elapsed, ok = post(i)
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+            i += args.concurrency
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 1),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 1),
+    }
+
+
+def total_memory(pids):
+    usage = [process_memory(pid) for pid in pids]
+    return {
+        "processes": len(pids),
+        "rss_mb": round(sum(u["rss_bytes"] for u in usage) / 2 ** 20, 1),
+        "pss_mb": round(sum(u["pss_bytes"] or 0 for u in usage) / 2 ** 20, 1),
+    }
+
+
+def measure_prefork(args):
+    url = f"http://127.0.0.1:{args.port}"
+    master = launch(args, "prefork", args.port, {"PREFORK_WORKERS": str(args.workers)})
+    try:
+        wait_ready(url, args.startup_timeout,
+                   lambda health: all(w["pid"] for w in health["prefork"]["workers"]))
+        result = drive_load([url], args)
+        # Measured under load's end state, while every worker is still up
+        workers = get_json(f"{url}/health")["prefork"]["workers"]
+        result.update(total_memory([master.pid] + [w["pid"] for w in workers]))
+        return result
+    finally:
+        stop([master])
+
+
+def measure_independent(args):
+    # Same per-process thread count the pre-fork workers get
+    threads = max(1, (os.cpu_count() or 1) // args.workers // int(os.environ.get('INFERENCE_WORKERS', 4)))
+    ports = [args.port + i for i in range(args.workers)]
+    processes = [launch(args, "single", port, {"TORCH_THREADS": str(threads)}) for port in ports]
+    try:
+        urls = [f"http://127.0.0.1:{port}" for port in ports]
+        for url in urls:
+            wait_ready(url, args.startup_timeout, lambda health: set(MODELS) <= set(health["models_loaded"]))
+        result = drive_load(urls, args)
+        result.update(total_memory([process.pid for process in processes]))
+        return result
+    finally:
+        stop(processes)
+
+
+def compare(args):
+    results = {
+        "prefork": measure_prefork(args),
+        "independent": measure_independent(args),
+    }
+    print(f"{args.workers} workers, {args.endpoint}/{args.model}, {args.doc_size} chars, "
+          f"concurrency {args.concurrency}, {args.duration:.0f}s")
+    print(f"{'mode':<12} {'procs':>5} {'RSS MB':>9} {'PSS MB':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'errors':>6}")
+    for mode, r in results.items():
+        print(f"{mode:<12} {r['processes']:>5} {r['rss_mb']:>9.1f} {r['pss_mb']:>9.1f} {r['throughput_rps']:>8.2f} "
+              f"{r['p50_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>6}")
+    # RSS counts shared weights once per process; PSS splits them
+    saved = results["independent"]["pss_mb"] - results["prefork"]["pss_mb"]
+    print(f"Pre-fork saves {saved:.0f} MB PSS; throughput ratio "
+          f"{results['prefork']['throughput_rps'] / max(results['independent']['throughput_rps'], 1e-9):.2f}x")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(results, config=vars(args)), f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Total memory and throughput of pre-fork workers sharing weights vs independent processes"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compare_parser = commands.add_parser("compare", help="Run both layouts under the same load")
+    compare_parser.add_argument("--workers", type=int, default=4)
+    compare_parser.add_argument("--port", type=int, default=5100, help="First port; independent processes use consecutive ones")
+    compare_parser.add_argument("--endpoint", choices=sorted(PAYLOAD_FIELDS), default="summarize")
+    compare_parser.add_argument("--model", default="inlegalbert")
+    compare_parser.add_argument("--doc-size", type=int, default=20000, help="Characters per document")
+    compare_parser.add_argument("--concurrency", type=int, default=8)
+    compare_parser.add_argument("--duration", type=float, default=30, help="Seconds of load per layout")
+    compare_parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per process")
+    compare_parser.add_argument("--startup-timeout", type=float, default=300)
+    compare_parser.add_argument("--output", help="Also write the results as JSON")
+    compare_parser.add_argument("--verbose", action="store_true", help="Show the servers' output")
+
+    serve_parser = commands.add_parser("serve", help="Start one server (used by compare)")
+    serve_parser.add_argument("mode", choices=["prefork", "single"])
+
+    for sub in (compare_parser, serve_parser):
+        sub.add_argument("--standins", action=argparse.BooleanOptionalAction, default=True,
+                         help="Randomly initialized stand-in models instead of the real checkpoints")
+        # Big enough that weights dominate each process's memory
+        sub.add_argument("--hidden-size", type=int, default=512)
+        sub.add_argument("--layers", type=int, default=6)
+        sub.add_argument("--vocab-size", type=int, default=8000)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        run_server(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
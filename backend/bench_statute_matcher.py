@@ -0,0 +1,129 @@
+import argparse
+import random
+import re
+import time
+
+from statute_matcher import STATUTE_PATTERNS, SECTION_PATTERN, match_statutes
+
+# Filler sentences used to pad the synthetic judgments
+FILLER = [
+    "The appellant filed the present appeal against the order of the High Court.",
+    "Learned counsel for the respondent submitted that the petition lacks merit.",
+    "The trial court recorded the evidence of the witnesses in detail.",
+    "We have heard the parties at length and perused the record.",
+    "The facts of the case, briefly stated, are as follows.",
+    "The impugned judgment does not suffer from any infirmity.",
+]
+
+CITATIONS = [
+    "Section {num} of the Indian Penal Code",
+    "Section {num} IPC",
+    "section {num} of the Code of Criminal Procedure",
+    "Section {num} of the Indian Contract Act",
+    "Section {num} of the Indian Evidence Act",
+    "Section {num} of the Specific Relief Act",
+    "section {num} of the Arbitration and Conciliation Act",
+    "the Constitution of India",
+    "Section {num} of the Companies Act",
+]
+
+
+def legacy_match_statutes(text):
+    # The original per-statute rescan from identify_statutes(), kept for comparison
+    found_statutes = []
+    for pattern, name in STATUTE_PATTERNS:
+        if re.search(pattern, text):
+            sections = []
+            for match in re.finditer(SECTION_PATTERN, text):
+                section_num = match.group(1)
+                statute_context = text[max(0, match.start() - 100):min(len(text), match.end() + 100)]
+                if re.search(pattern, statute_context):
+                    sections.append(section_num)
+            if not sections:
+                found_statutes.append({
+                    "id": str(len(found_statutes) + 1),
+                    "name": name,
+                    "section": "General reference",
+                    "relevance": f"The document references the {name}"
+                })
+            else:
+                for section in sections:
+                    found_statutes.append({
+                        "id": str(len(found_statutes) + 1),
+                        "name": name,
+                        "section": f"Section {section}",
+                        "relevance": f"The document references Section {section} of the {name}"
+                    })
+    return found_statutes
+
+
+def make_document(size, seed=0, citation_rate=0.15):
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        if rng.random() < citation_rate:
+            sentence = "The accused was charged under " + rng.choice(CITATIONS).format(num=rng.randint(1, 500)) + "."
+        else:
+            sentence = rng.choice(FILLER)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:size]
+
+
+def time_call(func, text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_size(value):
+    units = {"KB": 1024, "MB": 1024 * 1024}
+    value = value.upper()
+    for suffix, factor in units.items():
+        if value.endswith(suffix):
+            return int(float(value[:-len(suffix)]) * factor)
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and single-pass statute matchers")
+    parser.add_argument("--sizes", nargs="+", default=["10KB", "100KB", "1MB", "10MB"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-limit", default="1MB",
+                        help="Skip the legacy matcher above this size (it is quadratic)")
+    args = parser.parse_args()
+
+    legacy_limit = parse_size(args.legacy_limit)
+    documents = [(label, parse_size(label), make_document(parse_size(label))) for label in args.sizes]
+
+    # A faster matcher that finds different statutes isn't a speed-up; check
+    # every size the legacy matcher runs on before timing anything
+    legacy_results = {}
+    for label, size, text in documents:
+        if size > legacy_limit:
+            continue
+        expected, actual = legacy_match_statutes(text), match_statutes(text)
+        if expected != actual:
+            raise SystemExit(f"{label}: matcher output differs from the legacy matcher "
+                             f"({len(actual)} vs {len(expected)} entries)")
+        legacy_results[label] = expected
+
+    print(f"{'size':>10} {'entries':>9} {'legacy (s)':>12} {'matcher (s)':>12} {'speedup':>9}")
+    for label, size, text in documents:
+        new_time, new_result = time_call(match_statutes, text, args.repeat)
+        if label in legacy_results:
+            old_time, _ = time_call(legacy_match_statutes, text, 1)
+            legacy = f"{old_time:12.4f}"
+            speedup = f"{old_time / new_time:8.1f}x"
+        else:
+            legacy, speedup = f"{'skipped':>12}", f"{'-':>9}"
+        print(f"{label:>10} {len(new_result):>9} {legacy} {new_time:12.4f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
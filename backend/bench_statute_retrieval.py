@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from statute_retrieval import SectionRetriever, kmeans
+
+HIDDEN_SIZE = 768
+
+
+def random_unit_rows(rng, rows):
+    matrix = rng.standard_normal((rows, HIDDEN_SIZE)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def time_queries(retriever, queries, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        retriever.search(queries, k=5)
+        timings.append(time.perf_counter() - started)
+    return 1000 * float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure semantic statute retrieval latency against corpus size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000])
+    parser.add_argument("--chunks", type=int, default=16, help="Document chunks per query")
+    parser.add_argument("--ivf-lists", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_unit_rows(rng, args.chunks)
+    print(f"{'sections':>9} {'brute (ms)':>11} {'ivf (ms)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            matrix = random_unit_rows(rng, size)
+            embeddings_path = os.path.join(tmp, f"emb_{size}.npy")
+            np.save(embeddings_path, matrix.astype(np.float16))
+            brute = time_queries(SectionRetriever(embeddings_path), queries, args.repeat)
+
+            ivf = "-"
+            nlist = min(args.ivf_lists, size // 39)
+            if nlist >= 2:
+                # Train the lists on a sample like a real offline build would
+                sample = matrix[rng.choice(size, size=min(size, nlist * 64), replace=False)]
+                centroids, _ = kmeans(sample, nlist, iterations=10)
+                assignments = np.argmax(matrix @ centroids.T, axis=1)
+                ivf_path = os.path.join(tmp, f"ivf_{size}.npz")
+                np.savez(ivf_path, centroids=centroids, assignments=assignments)
+                retriever = SectionRetriever(embeddings_path, ivf_path, nprobe=args.nprobe)
+                ivf = f"{time_queries(retriever, queries, args.repeat):9.2f}"
+            print(f"{size:>9} {brute:11.2f} {ivf:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import argparse
+import time
+
+import numpy as np
+from transformers import AutoTokenizer, AutoModelForMaskedLM
+
+from extractive import embed_sentences
+from statute_index import DEFAULT_INDEX_PATH, StatuteIndex
+from statute_retrieval import DEFAULT_EMBEDDINGS_PATH, DEFAULT_IVF_PATH, kmeans, section_passages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed statute sections with InLegalBERT for semantic retrieval")
+    parser.add_argument("--model", default="law-ai/InLegalBERT")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Statute index built by build_statute_index.py")
+    parser.add_argument("--output", default=DEFAULT_EMBEDDINGS_PATH)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--ivf-lists", type=int, default=0,
+                        help="Also build an IVF index with this many lists (for large corpora)")
+    parser.add_argument("--ivf-output", default=DEFAULT_IVF_PATH)
+    args = parser.parse_args()
+
+    statute_index = StatuteIndex(args.index)
+    passages = section_passages(statute_index)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForMaskedLM.from_pretrained(args.model)
+    model.eval()
+
+    started = time.perf_counter()
+    embeddings = embed_sentences(model, tokenizer, passages, batch_size=args.batch_size, max_length=256)
+    np.save(args.output, embeddings.astype(np.float16))
+    print(f"Embedded {len(passages)} sections into {args.output} in {time.perf_counter() - started:.1f}s")
+
+    if args.ivf_lists:
+        centroids, assignments = kmeans(embeddings, args.ivf_lists)
+        np.savez(args.ivf_output, centroids=centroids, assignments=assignments)
+        print(f"Wrote IVF index with {args.ivf_lists} lists to {args.ivf_output}")
+
+
+if __name__ == "__main__":
+    main()
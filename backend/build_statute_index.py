@@ -0,0 +1,20 @@
+import argparse
+import time
+
+from statute_index import DEFAULT_INDEX_PATH, DEFAULT_SOURCE_PATH, build_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the statute/section index used by the backend")
+    parser.add_argument("--source", default=DEFAULT_SOURCE_PATH, help="Statute source JSON")
+    parser.add_argument("--output", default=DEFAULT_INDEX_PATH, help="Index file to write")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    statutes, sections = build_index(args.source, args.output)
+    print(f"Indexed {sections} sections of {statutes} statutes into {args.output} "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
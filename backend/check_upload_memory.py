@@ -0,0 +1,120 @@
+import argparse
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+os.environ["MODEL_WARMUP"] = ""
+
+import app as backend  # noqa: E402
+from bench_endpoints import install_standins  # noqa: E402
+from bench_judgment_scorer import make_facts  # noqa: E402
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_document(path, size_mb):
+    # Written in 1 MB blocks so the generator itself stays small
+    block = make_facts(1024 * 1024, seed=1).encode("utf-8")
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+    return os.path.getsize(path)
+
+
+def post_chunked_multipart(client, endpoint, payload, closed=True):
+    # No Content-Length, like a client streaming a multipart upload
+    boundary = "check-upload-memory"
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="bundle.txt"\r\n'
+            f"Content-Type: text/plain\r\n\r\n").encode() + payload
+    if closed:
+        body += f"\r\n--{boundary}--\r\n".encode()
+    return client.post(endpoint, input_stream=io.BytesIO(body),
+                       content_type=f"multipart/form-data; boundary={boundary}",
+                       headers={"Transfer-Encoding": "chunked"},
+                       environ_overrides={"wsgi.input_terminated": True})
+
+
+def check_chunked_limit(client):
+    # INGEST_MAX_BYTES must hold for chunked multipart bodies too
+    failures = 0
+    limit = backend.INGEST_MAX_BYTES
+    backend.INGEST_MAX_BYTES = 1024 * 1024
+    try:
+        for size, expected in ((512 * 1024, 200), (2 * 1024 * 1024, 413)):
+            payload = make_facts(size, seed=2).encode("utf-8")
+            response = post_chunked_multipart(client, "/upload/identify-statutes", payload)
+            ok = response.status_code == expected
+            failures += not ok
+            print(f"  chunked multipart {len(payload) / 2 ** 20:4.1f} MB against a 1 MB limit: "
+                  f"status {response.status_code}, expected {expected}  {'ok' if ok else 'FAILED'}")
+        # A body cut off before its closing boundary gets a JSON 400
+        response = post_chunked_multipart(client, "/upload/identify-statutes", b"cut off", closed=False)
+        ok = response.status_code == 400 and response.is_json
+        failures += not ok
+        print(f"  malformed chunked multipart: status {response.status_code}, expected 400  "
+              f"{'ok' if ok else 'FAILED'}")
+    finally:
+        backend.INGEST_MAX_BYTES = limit
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that large uploads are processed in bounded memory")
+    parser.add_argument("--size-mb", type=int, default=300, help="Size of the generated document")
+    parser.add_argument("--ceiling-mb", type=float, default=128, help="Allowed peak RSS growth")
+    # Extractive summaries embed every sentence, which takes a while even
+    # with the stand-in model, so they get a smaller document
+    parser.add_argument("--summary-size-mb", type=int, default=16, help="Size of the document summarized")
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--vocab-size", type=int, default=8000)
+    args = parser.parse_args()
+
+    install_standins(args)
+    client = backend.app.test_client()
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bundle.txt")
+        size = write_document(path, args.size_mb)
+        summary_path = os.path.join(tmp, "summary.txt")
+        summary_size = write_document(summary_path, args.summary_size_mb)
+        print(f"Generated {size / 2 ** 20:.0f} MB and {summary_size / 2 ** 20:.0f} MB documents")
+
+        requests = [
+            ("raw", "/upload/identify-statutes", path, size),
+            ("raw", "/upload/predict-judgment", path, size),
+            ("multipart", "/upload/identify-statutes", path, size),
+            ("raw", "/upload/summarize?model=inlegalbert&type=extractive", summary_path, summary_size),
+        ]
+        for encoding, endpoint, document_path, document_size in requests:
+            baseline = peak_rss_mb()
+            started = time.perf_counter()
+            with open(document_path, "rb") as f:
+                if encoding == "raw":
+                    response = client.post(endpoint, input_stream=f, content_length=document_size, content_type="text/plain")
+                else:
+                    response = client.post(endpoint, data={"file": (f, "bundle.txt")},
+                                           content_type="multipart/form-data")
+            elapsed = time.perf_counter() - started
+            # ru_maxrss only grows, so growth is measured against the peak so far
+            growth = peak_rss_mb() - baseline
+            ok = response.status_code == 200 and growth <= args.ceiling_mb
+            failures += not ok
+            print(f"{encoding:>9} {endpoint:<52} status {response.status_code}  {elapsed:6.1f}s  "
+                  f"peak RSS growth {growth:6.1f} MB  {'ok' if ok else 'FAILED'}")
+
+        failures += check_chunked_limit(client)
+
+    if failures:
+        print(f"{failures} upload(s) failed or exceeded the {args.ceiling_mb:.0f} MB ceiling")
+        sys.exit(1)
+    print(f"All uploads stayed within {args.ceiling_mb:.0f} MB of additional RSS")
+
+
+if __name__ == "__main__":
+    main()
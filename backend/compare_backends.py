@@ -0,0 +1,129 @@
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, AutoModelForMaskedLM
+
+from extractive import embed_sentences, split_sentences
+from inference_backends import BACKENDS, optimize_model, model_size_bytes
+from load_test_scheduler import SAMPLE_TEXTS
+
+# Fixed corpus so runs are comparable across deployments
+CORPUS = SAMPLE_TEXTS + [
+    "The respondent landlord filed an eviction petition on the ground of bona fide requirement. "
+    "The Rent Controller allowed the petition and the appellate authority confirmed the order. "
+    "The tenant contends that the landlord owns other premises in the same city.",
+    "The petitioner was denied promotion despite being senior to the private respondents. "
+    "The department relied on an amended rule that came into force after the vacancy arose. "
+    "The Tribunal held that vacancies must be filled under the rules in force when they arose.",
+]
+
+GEN_KWARGS = dict(max_length=128, min_length=32, length_penalty=2.0, num_beams=4, early_stopping=True)
+
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b, 1):
+            current.append(previous[j - 1] + 1 if x == y else max(previous[j], current[-1]))
+        previous = current
+    return previous[-1]
+
+
+def rouge_scores(candidate, reference):
+    # ROUGE-1 and ROUGE-L F1 on lowercase whitespace tokens
+    cand, ref = candidate.lower().split(), reference.lower().split()
+    if not cand or not ref:
+        return {"rouge1": float(cand == ref), "rougeL": float(cand == ref)}
+
+    def f1(overlap):
+        if overlap == 0:
+            return 0.0
+        precision, recall = overlap / len(cand), overlap / len(ref)
+        return 2 * precision * recall / (precision + recall)
+
+    unigram = sum(min(cand.count(w), ref.count(w)) for w in set(cand))
+    return {"rouge1": f1(unigram), "rougeL": f1(lcs_length(cand, ref))}
+
+
+def run_backend(args):
+    # Runs in its own process so peak RSS belongs to this backend only
+    tokenizer = AutoTokenizer.from_pretrained(args.led_model)
+    model = optimize_model(AutoModelForSeq2SeqLM.from_pretrained(args.led_model), args.backend)
+    outputs, latencies = [], []
+    with torch.inference_mode():
+        # Untimed, so the compile backend's compilation isn't counted
+        inputs = tokenizer(CORPUS[0], return_tensors="pt", max_length=4096, truncation=True)
+        model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], **GEN_KWARGS)
+        for text in CORPUS:
+            inputs = tokenizer(text, return_tensors="pt", max_length=4096, truncation=True)
+            started = time.perf_counter()
+            ids = model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], **GEN_KWARGS)
+            latencies.append(time.perf_counter() - started)
+            outputs.append(tokenizer.decode(ids[0], skip_special_tokens=True))
+    led_size = model_size_bytes(model)
+    del model
+
+    bert_tokenizer = AutoTokenizer.from_pretrained(args.bert_model)
+    bert = optimize_model(AutoModelForMaskedLM.from_pretrained(args.bert_model), args.backend)
+    sentences = [s for text in CORPUS for s in split_sentences(text)]
+    # Untimed as well; this is the encoder module the extractive summarizer runs
+    embed_sentences(bert, bert_tokenizer, sentences)
+    started = time.perf_counter()
+    embeddings = embed_sentences(bert, bert_tokenizer, sentences)
+    bert_seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "backend": args.backend,
+        "outputs": outputs,
+        "embeddings": embeddings.tolist(),
+        "led_p50_ms": round(1000 * float(np.median(latencies)), 1),
+        "led_total_s": round(sum(latencies), 2),
+        "led_size_mb": round(led_size / 2 ** 20, 1),
+        "bert_sent_per_s": round(len(sentences) / bert_seconds, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CPU inference backends against fp32")
+    parser.add_argument("--led-model", default="nsi319/legal-led-base-16384")
+    parser.add_argument("--bert-model", default="law-ai/InLegalBERT")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--backend", choices=BACKENDS, help="Run one backend in this process (used internally)")
+    args = parser.parse_args()
+
+    if args.backend:
+        run_backend(args)
+        return
+
+    results = {}
+    for backend in ["fp32"] + [b for b in args.backends if b != "fp32"]:
+        cmd = [sys.executable, __file__, "--backend", backend,
+               "--led-model", args.led_model, "--bert-model", args.bert_model]
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        results[backend] = json.loads(out.strip().splitlines()[-1])
+
+    reference = results["fp32"]
+    ref_embeddings = np.array(reference["embeddings"])
+    print(f"{'backend':>8} {'LED p50 ms':>11} {'LED size MB':>12} {'peak RSS MB':>12} "
+          f"{'BERT sent/s':>12} {'ROUGE-1':>8} {'ROUGE-L':>8} {'emb cos':>8}")
+    for backend, result in results.items():
+        scores = [rouge_scores(out, ref) for out, ref in zip(result["outputs"], reference["outputs"])]
+        rouge1 = np.mean([s["rouge1"] for s in scores])
+        rougeL = np.mean([s["rougeL"] for s in scores])
+        # Embeddings are unit length, so the row-wise dot product is the cosine
+        cosine = float(np.mean(np.sum(np.array(result["embeddings"]) * ref_embeddings, axis=1)))
+        print(f"{backend:>8} {result['led_p50_ms']:11.1f} {result['led_size_mb']:12.1f} "
+              f"{result['peak_rss_mb']:12.1f} {result['bert_sent_per_s']:12.1f} "
+              f"{rouge1:8.3f} {rougeL:8.3f} {cosine:8.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import re
+import time
+
+import numpy as np
+import torch
+
+from metrics import stage
+
+SENTENCE_SPLIT_REGEX = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
+    return [s for s in SENTENCE_SPLIT_REGEX.split(text) if s.strip()]
+
+
+def encoder_of(model):
+    # Run only the BERT encoder of a masked-LM model; the MLM head isn't needed
+    return getattr(model, model.base_model_prefix, model)
+
+
+def embed_sentences(model, tokenizer, sentences, batch_size=32, max_length=128):
+    """Mean-pooled, L2-normalized InLegalBERT embeddings as a float32 matrix."""
+    encoder = encoder_of(model)
+    chunks = []
+    with torch.inference_mode():
+        for start in range(0, len(sentences), batch_size):
+            batch = tokenizer(
+                sentences[start:start + batch_size],
+                padding=True, truncation=True, max_length=max_length, return_tensors="pt"
+            )
+            hidden = encoder(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).last_hidden_state
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            chunks.append(pooled.float().numpy())
+    embeddings = np.concatenate(chunks) if chunks else np.zeros((0, encoder.config.hidden_size), dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, 1e-12)
+
+
+def mmr_select(embeddings, k, diversity=0.3, centroid=None):
+    """Pick k sentence indices by maximal marginal relevance against the
+    document centroid, returned in original order."""
+    n = len(embeddings)
+    if k <= 0:
+        return []
+    if n <= k:
+        return list(range(n))
+    if centroid is None:
+        centroid = embeddings.mean(axis=0)
+    centroid = centroid / max(np.linalg.norm(centroid), 1e-12)
+    relevance = embeddings @ centroid
+
+    selected = [int(np.argmax(relevance))]
+    # Highest similarity of every sentence to anything already selected, one
+    # matrix-vector product per pick instead of the full n x n matrix
+    redundancy = embeddings @ embeddings[selected[0]]
+    for _ in range(k - 1):
+        scores = (1 - diversity) * relevance - diversity * redundancy
+        scores[selected] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        np.maximum(redundancy, embeddings @ embeddings[best], out=redundancy)
+    return sorted(selected)
+
+
+class ExtractiveSummarizer:
+    """Selects the most central, non-redundant sentences of a document using
+    InLegalBERT sentence embeddings."""
+
+    def __init__(self, load_model, batch_size=32, max_length=128, diversity=0.3,
+                 max_stream_sentences=None, time_limit=None):
+        # load_model() returns (model, tokenizer)
+        self.load_model = load_model
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.diversity = diversity
+        # Bounds for select_stream(); None means unbounded
+        self.max_stream_sentences = max_stream_sentences
+        self.time_limit = time_limit
+
+    def select(self, text, k=5):
+        with stage("sentence_split"):
+            sentences = split_sentences(text)
+        if len(sentences) <= k:
+            return sentences
+        model, tokenizer = self.load_model()
+        with stage("embed"):
+            embeddings = embed_sentences(model, tokenizer, sentences, self.batch_size, self.max_length)
+        with stage("mmr"):
+            selected = mmr_select(embeddings, k, self.diversity)
+        return [sentences[i] for i in selected]
+
+    def select_stream(self, sentences, k=5, block_size=4096):
+        """select() over an iterable of sentences, e.g. from
+        ingest.iter_sentences(), for documents too long to embed at once.
+        Each block of `block_size` sentences keeps its k MMR picks as
+        candidates and adds to a running embedding sum; the final pick runs
+        over the candidates against the centroid of the whole document.
+        A document that fits in one block gets the same result as select().
+
+        Returns (selected, truncated). Reading stops after
+        max_stream_sentences sentences, or at the first block boundary past
+        time_limit seconds; the pick then covers the sentences read so far."""
+        deadline = time.perf_counter() + self.time_limit if self.time_limit else None
+        candidates, candidate_embeddings = [], []
+        total = None
+        block = []
+        read = 0
+        truncated = False
+
+        def flush():
+            nonlocal total
+            model, tokenizer = self.load_model()
+            with stage("embed"):
+                embeddings = embed_sentences(model, tokenizer, block, self.batch_size, self.max_length)
+            total = embeddings.sum(axis=0) if total is None else total + embeddings.sum(axis=0)
+            with stage("mmr"):
+                picked = mmr_select(embeddings, k, self.diversity)
+            candidates.extend(block[i] for i in picked)
+            candidate_embeddings.append(embeddings[picked])
+
+        for sentence in sentences:
+            if self.max_stream_sentences is not None and read >= self.max_stream_sentences:
+                truncated = True
+                break
+            block.append(sentence)
+            read += 1
+            if len(block) == block_size:
+                flush()
+                block = []
+                if deadline is not None and time.perf_counter() > deadline:
+                    truncated = True
+                    break
+        if block and (candidates or len(block) > k):
+            flush()
+        elif block:
+            # Short document: nothing to rank
+            return block[:max(k, 0)], truncated
+        if not candidates:
+            return [], truncated
+        with stage("mmr"):
+            selected = mmr_select(np.concatenate(candidate_embeddings), k, self.diversity, centroid=total)
+        return [candidates[i] for i in selected], truncated
+
+    def select_many(self, texts, ks):
+        """select() for several documents at once. All their sentences go
+        through one embed_sentences() call, so embedding batches fill up
+        across documents. A k of None skips that document (result None)."""
+        with stage("sentence_split"):
+            split = [split_sentences(text) if k is not None else [] for text, k in zip(texts, ks)]
+        results = [sentences if k is not None and len(sentences) <= k else None
+                   for sentences, k in zip(split, ks)]
+        pending = [i for i, k in enumerate(ks) if k is not None and results[i] is None]
+        if not pending:
+            return results
+        model, tokenizer = self.load_model()
+        with stage("embed"):
+            embeddings = embed_sentences(model, tokenizer, [s for i in pending for s in split[i]],
+                                         self.batch_size, self.max_length)
+        start = 0
+        with stage("mmr"):
+            for i in pending:
+                block = embeddings[start:start + len(split[i])]
+                start += len(split[i])
+                results[i] = [split[i][j] for j in mmr_select(block, ks[i], self.diversity)]
+        return results
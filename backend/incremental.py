@@ -0,0 +1,229 @@
+import hashlib
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from extractive import embed_sentences, mmr_select, split_sentences
+from metrics import stage
+from statute_matcher import link_statutes, scan_spans
+
+# Chunk sizes in characters; the maximum keeps a chunk inside one LED window
+MIN_CHUNK_CHARS = 2048
+MAX_CHUNK_CHARS = 16384
+# On average one eligible sentence break in BOUNDARY_DIVISOR ends a chunk
+BOUNDARY_DIVISOR = 32
+# Characters before a sentence break that decide whether it ends a chunk
+HASH_WINDOW = 64
+# Ends at the same offsets as SENTENCE_SPLIT_REGEX, but without the
+# lookbehind the scan can jump straight to punctuation
+SENTENCE_BREAK_REGEX = re.compile(r'[.!?]\s+')
+
+
+def content_chunks(text, min_chars=MIN_CHUNK_CHARS, max_chars=MAX_CHUNK_CHARS, divisor=BOUNDARY_DIVISOR):
+    """Split text into content-defined chunks.
+
+    Chunks end at sentence breaks whose preceding HASH_WINDOW characters
+    hash to 0 mod `divisor`. Whether a break is a boundary depends only on
+    the text right before it, so an edit only changes the chunks around it
+    and the rest of the document chunks the same way as before. Cutting at
+    sentence breaks also keeps sentences and statute citations whole.
+
+    The exception is a run of more than 2 * max_chars characters without a
+    sentence break, which is cut at the last whitespace before max_chars
+    (or at max_chars if there is none). A citation spanning such a cut is
+    split between two chunks."""
+    chunks = []
+    start = 0
+    for match in SENTENCE_BREAK_REGEX.finditer(text):
+        cut = match.end()
+        length = cut - start
+        if length < min_chars:
+            continue
+        window = text[max(cut - HASH_WINDOW, 0):cut].encode("utf-8")
+        if length >= max_chars or zlib.crc32(window) % divisor == 0:
+            chunks.append(text[start:cut])
+            start = cut
+    if start < len(text):
+        chunks.append(text[start:])
+
+    # Text with no sentence breaks at all still has to fit a model window;
+    # cutting after whitespace at least keeps words whole
+    bounded = []
+    for chunk in chunks:
+        while len(chunk) > 2 * max_chars:
+            cut = max(chunk.rfind(space, 0, max_chars) for space in " \n\t") + 1 or max_chars
+            bounded.append(chunk[:cut])
+            chunk = chunk[cut:]
+        bounded.append(chunk)
+    return bounded
+
+
+def chunk_key(chunk):
+    return hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+
+
+class ChunkMemo:
+    """LRU of per-chunk results bounded by their approximate size in bytes."""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "hits": self._hits, "misses": self._misses}
+
+
+class ChunkedDocument:
+    def __init__(self, chunks, diff):
+        self.chunks = chunks
+        self.keys = [chunk_key(chunk) for chunk in chunks]
+        self.offsets = []
+        offset = 0
+        for chunk in chunks:
+            self.offsets.append(offset)
+            offset += len(chunk)
+        self.diff = diff
+
+
+class IncrementalAnalyzer:
+    """Re-analyses edited documents by recomputing only the chunks that
+    changed.
+
+    Documents are split into content-defined chunks and results are
+    memoized per chunk: statute/section spans, sentences and their
+    InLegalBERT embeddings, and Legal-LED map-stage summaries. Merging is
+    done over the full document, so the output matches a full recompute,
+    except for sentences or citations that content_chunks() had to split
+    in a long run without sentence breaks.
+    The memo is content-addressed; the document id only tracks the
+    previous version of each document to report what changed."""
+
+    def __init__(self, extractive, map_reduce, max_bytes=256 * 1024 * 1024, max_documents=1024):
+        self.extractive = extractive
+        self.map_reduce = map_reduce
+        self.memo = ChunkMemo(max_bytes)
+        self.max_documents = max_documents
+        self._versions = OrderedDict()  # document id -> (version, chunk keys)
+        self._lock = threading.Lock()
+
+    def prepare(self, document_id, text):
+        with stage("chunk"):
+            document = ChunkedDocument(content_chunks(text), None)
+        with self._lock:
+            version, previous = self._versions.pop(document_id, (0, None))
+            self._versions[document_id] = (version + 1, document.keys)
+            while len(self._versions) > self.max_documents:
+                self._versions.popitem(last=False)
+        current = set(document.keys)
+        before = set(previous) if previous is not None else set()
+        document.diff = {
+            "document_id": document_id,
+            "version": version + 1,
+            "chunks": len(document.keys),
+            "changed": len(current - before),
+            "removed": len(before - current),
+        }
+        return document
+
+    def statutes(self, document):
+        """match_statutes() entries for the whole document."""
+        spans = []
+        with stage("statute_scan"):
+            for chunk, key, offset in zip(document.chunks, document.keys, document.offsets):
+                chunk_spans = self.memo.get(("spans", key))
+                if chunk_spans is None:
+                    chunk_spans = list(scan_spans(chunk))
+                    self.memo.put(("spans", key), chunk_spans, 64 + 96 * len(chunk_spans))
+                spans.extend((kind, value, start + offset, end + offset) for kind, value, start, end in chunk_spans)
+        return link_statutes(spans)
+
+    def _sentences(self, chunk, key):
+        sentences = self.memo.get(("sentences", key))
+        if sentences is None:
+            sentences = split_sentences(chunk)
+            self.memo.put(("sentences", key), sentences, 64 + sum(len(s) + 56 for s in sentences))
+        return sentences
+
+    def select_sentences(self, document, k=5):
+        """ExtractiveSummarizer.select() for the whole document, embedding
+        only sentences of chunks that weren't seen before."""
+        with stage("sentence_split"):
+            per_chunk = [self._sentences(chunk, key) for chunk, key in zip(document.chunks, document.keys)]
+        sentences = [sentence for chunk_sentences in per_chunk for sentence in chunk_sentences]
+        if len(sentences) <= k:
+            return sentences
+
+        summarizer = self.extractive
+        embedding_key = ("embeddings", summarizer.max_length)
+        embeddings = [self.memo.get(embedding_key + (key,)) if chunk_sentences else None
+                      for key, chunk_sentences in zip(document.keys, per_chunk)]
+        missing = [i for i, chunk_sentences in enumerate(per_chunk) if chunk_sentences and embeddings[i] is None]
+        if missing:
+            model, tokenizer = summarizer.load_model()
+            with stage("embed"):
+                fresh = embed_sentences(model, tokenizer, [s for i in missing for s in per_chunk[i]],
+                                        summarizer.batch_size, summarizer.max_length)
+            start = 0
+            for i in missing:
+                embeddings[i] = fresh[start:start + len(per_chunk[i])]
+                start += len(per_chunk[i])
+                self.memo.put(embedding_key + (document.keys[i],), embeddings[i], embeddings[i].nbytes)
+
+        matrix = np.concatenate([e for e in embeddings if e is not None])
+        with stage("mmr"):
+            selected = mmr_select(matrix, k, summarizer.diversity)
+        return [sentences[i] for i in selected]
+
+    def summarize(self, document, gen_kwargs):
+        """MapReduceSummarizer events with consecutive chunks packed into
+        model windows; map summaries of windows whose chunks are unchanged
+        come from the memo."""
+        params = tuple(sorted(gen_kwargs.items()))
+        windows, window_keys, truncated = self.map_reduce.pack_pieces(document.chunks, document.keys)
+        known = {}
+        for index, key in enumerate(window_keys):
+            summary = self.memo.get(("summary", key, params))
+            if summary is not None:
+                known[index] = summary
+        for event in self.map_reduce.summarize_windows(windows, gen_kwargs, known, truncated):
+            if event["stage"] == "map" and not event["cached"]:
+                key = ("summary", window_keys[event["chunk"]], params)
+                self.memo.put(key, event["summary"], 64 + len(event["summary"]))
+            yield event
+
+    def stats(self):
+        with self._lock:
+            documents = len(self._versions)
+        return dict(self.memo.stats(), documents=documents)
@@ -0,0 +1,64 @@
+import io
+
+import torch
+
+BACKENDS = ("fp32", "int8", "bf16", "compile")
+
+
+def bf16_supported():
+    # Only worth it on CPUs with native bf16 (AVX512-BF16 / AMX)
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def optimize_model(model, backend="fp32"):
+    """Return `model` prepared for CPU inference with the given backend.
+
+    fp32    eager mode, unchanged
+    int8    dynamic int8 quantization of every nn.Linear
+    bf16    bfloat16 weights when the CPU supports them, otherwise fp32
+    compile torch.compile of the modules that run: the base encoder of an
+            encoder-only model (embed_sentences() calls it directly), or the
+            encoder plus the per-step forward of a seq2seq model
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {backend}, expected one of {', '.join(BACKENDS)}")
+    model.eval()
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    elif backend == "bf16":
+        if bf16_supported():
+            model = model.to(torch.bfloat16)
+        else:
+            print("bf16 is not supported on this CPU, keeping fp32")
+    elif backend == "compile":
+        if model.config.is_encoder_decoder:
+            # generate() runs the encoder once, then the model forward per step
+            modules = [model.get_encoder(), model]
+        else:
+            # The task head's forward calls the base model, so this covers both
+            modules = [getattr(model, model.base_model_prefix, model)]
+        try:
+            compiled = [compile_forward(module) for module in modules]
+        except RuntimeError as e:
+            # torch 2.0 has no torch.compile on Windows or Python 3.11+
+            print(f"torch.compile is not available ({str(e)}), keeping eager mode")
+        else:
+            for module, forward in zip(modules, compiled):
+                module.forward = forward
+    return model
+
+
+def compile_forward(module):
+    # Compile only the forward so generate() and config access keep working
+    return torch.compile(module.forward, dynamic=True)
+
+
+def model_size_bytes(model):
+    # Serialized state_dict size; unlike parameters() this also counts the
+    # packed weights of dynamically quantized layers
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
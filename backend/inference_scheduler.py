@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import torch
+
+from metrics import count_tokens, current_labels, record_stage, stage
+
+
+class _Request:
+    __slots__ = ("input_ids", "gen_kwargs", "key", "future", "enqueued_at", "labels")
+
+    def __init__(self, input_ids, gen_kwargs, key):
+        self.input_ids = input_ids
+        self.gen_kwargs = gen_kwargs
+        self.key = key
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        # Metric labels of the submitting request; batches run on another thread
+        self.labels = current_labels()
+
+
+def length_bucket(length, smallest=64):
+    # Round up to the next power of two so similar lengths share padding
+    bucket = smallest
+    while bucket < length:
+        bucket *= 2
+    return bucket
+
+
+class GenerationScheduler:
+    """Owns a seq2seq model and runs queued generate() calls in padded batches.
+
+    Callers submit text and get a Future back; a background thread groups
+    pending requests that share generation parameters and a padded-length
+    bucket, waits up to `max_wait_ms` for a batch to fill, and runs one
+    `generate` call per batch."""
+
+    def __init__(self, load_model, max_batch_size=8, max_wait_ms=20, max_input_length=4096, num_threads=None):
+        # load_model() returns (model, tokenizer); it is called per submit and
+        # per batch so the model can be loaded lazily and evicted when idle
+        self.load_model = load_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_input_length = max_input_length
+        # Torch threads for the scheduler's generate calls; None leaves the
+        # count as it is. threads_used is what torch reported for the last batch.
+        self.num_threads = num_threads
+        self.threads_used = None
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self._stats_lock = threading.Lock()
+        self._started_at = time.perf_counter()
+        self._completed = 0
+        self._failed = 0
+        self._batches = 0
+        self._batch_sizes = {}
+        self._queue_latency_total = 0.0
+        self._queue_latency_max = 0.0
+
+        self._worker = threading.Thread(target=self._run, name="led-scheduler", daemon=True)
+        self._worker.start()
+
+    def submit(self, text, **gen_kwargs):
+        # Tokenize in the caller's thread so the scheduler only does model work
+        _, tokenizer = self.load_model()
+        with stage("tokenize"):
+            input_ids = tokenizer(
+                text, max_length=self.max_input_length, truncation=True
+            )["input_ids"]
+        return self.submit_ids(input_ids, **gen_kwargs)
+
+    def submit_many(self, texts, **gen_kwargs):
+        # Tokenize a whole list in one tokenizer call and queue every item
+        _, tokenizer = self.load_model()
+        with stage("tokenize"):
+            encoded = tokenizer(texts, max_length=self.max_input_length, truncation=True)["input_ids"]
+        return [self.submit_ids(input_ids, **gen_kwargs) for input_ids in encoded]
+
+    def submit_ids(self, input_ids, **gen_kwargs):
+        # Queue already tokenized input, e.g. a window of a longer document
+        key = (length_bucket(len(input_ids)), tuple(sorted(gen_kwargs.items())))
+        req = _Request(input_ids, gen_kwargs, key)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Scheduler has been stopped")
+            self._pending.append(req)
+            self._cond.notify()
+        return req.future
+
+    def generate(self, text, timeout=None, **gen_kwargs):
+        return self.submit(text, **gen_kwargs).result(timeout=timeout)
+
+    def restart_after_fork(self):
+        # Threads don't survive fork(); a forked worker process gets an
+        # empty queue and its own scheduler thread
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="led-scheduler", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._pending and not self._stopped:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            # The oldest request decides which bucket runs next; give its
+            # bucket until the oldest request's deadline to fill up.
+            key = self._pending[0].key
+            deadline = self._pending[0].enqueued_at + self.max_wait
+            while not self._stopped:
+                same = sum(1 for r in self._pending if r.key == key)
+                remaining = deadline - time.perf_counter()
+                if same >= self.max_batch_size or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, rest = [], deque()
+            for req in self._pending:
+                if req.key == key and len(batch) < self.max_batch_size:
+                    batch.append(req)
+                else:
+                    rest.append(req)
+            self._pending = rest
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            # Drop requests whose callers gave up (e.g. hit a time limit)
+            batch = [req for req in batch if req.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            # torch keeps one process-wide thread count, which request
+            # threads set too, so it is applied again before every batch.
+            # A request that starts mid-batch can still change it.
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            self.threads_used = torch.get_num_threads()
+            started = time.perf_counter()
+            try:
+                outputs = self._generate_batch(batch)
+            except Exception as e:
+                for req in batch:
+                    req.future.set_exception(e)
+                self._record(batch, started, failed=True)
+                continue
+            for req, output in zip(batch, outputs):
+                req.future.set_result(output)
+            self._record(batch, started)
+
+    def _generate_batch(self, batch):
+        model, tokenizer = self.load_model()
+        started = time.perf_counter()
+        padded = tokenizer.pad(
+            {"input_ids": [req.input_ids for req in batch]}, return_tensors="pt"
+        )
+        padded_at = time.perf_counter()
+        with torch.inference_mode():
+            output_ids = model.generate(
+                padded["input_ids"],
+                attention_mask=padded["attention_mask"],
+                **batch[0].gen_kwargs
+            )
+        generated_at = time.perf_counter()
+        outputs = tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+        decoded_at = time.perf_counter()
+
+        # Every request in the batch waited on the whole batch, so each one
+        # is charged the full stage times
+        out_lengths = (output_ids != tokenizer.pad_token_id).sum(dim=1).tolist()
+        for req, out_length in zip(batch, out_lengths):
+            record_stage("queue", started - req.enqueued_at, req.labels)
+            record_stage("pad", padded_at - started, req.labels)
+            record_stage("generate", generated_at - padded_at, req.labels)
+            record_stage("decode", decoded_at - generated_at, req.labels)
+            count_tokens("in", len(req.input_ids), req.labels)
+            count_tokens("out", out_length, req.labels)
+        return outputs
+
+    def _record(self, batch, started, failed=False):
+        with self._stats_lock:
+            self._batches += 1
+            size = len(batch)
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            if failed:
+                self._failed += size
+            else:
+                self._completed += size
+            for req in batch:
+                waited = started - req.enqueued_at
+                self._queue_latency_total += waited
+                self._queue_latency_max = max(self._queue_latency_max, waited)
+
+    def stats(self):
+        with self._stats_lock:
+            handled = self._completed + self._failed
+            uptime = time.perf_counter() - self._started_at
+            return {
+                "completed": self._completed,
+                "failed": self._failed,
+                "queued": len(self._pending),
+                "batches": self._batches,
+                "avg_batch_size": round(handled / self._batches, 2) if self._batches else 0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "avg_queue_latency_ms": round(1000 * self._queue_latency_total / handled, 2) if handled else 0,
+                "max_queue_latency_ms": round(1000 * self._queue_latency_max, 2),
+                "throughput_rps": round(self._completed / uptime, 3) if uptime else 0,
+            }
@@ -0,0 +1,201 @@
+import codecs
+import io
+import mmap
+import tempfile
+
+from extractive import SENTENCE_SPLIT_REGEX
+
+# Bytes decoded per step when reading a mapped upload
+CHUNK_BYTES = 1024 * 1024
+# Longest stretch scanned for the last sentence break in a chunk
+BOUNDARY_SEARCH = 64 * 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class CappedStream:
+    """Read-only stream wrapper that raises UploadTooLarge once more than
+    `max_bytes` have been read, for bodies without a Content-Length."""
+
+    def __init__(self, stream, max_bytes):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Upload exceeds the limit of {self.max_bytes} bytes")
+        return data
+
+
+def spool_stream(stream, max_bytes, spool_bytes=8 * 1024 * 1024, chunk_size=CHUNK_BYTES):
+    """Copy a request body to a temp file that stays in memory up to
+    `spool_bytes` and moves to disk after that. Works for chunked bodies
+    with no Content-Length."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    capped = CappedStream(stream, max_bytes)
+    try:
+        while True:
+            chunk = capped.read(chunk_size)
+            if not chunk:
+                break
+            spooled.write(chunk)
+    except UploadTooLarge:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+class MappedDocument:
+    """A text or PDF upload read through mmap instead of being loaded.
+
+    Disk-backed files are memory-mapped and consumed pages are released as
+    the text is decoded, so resident memory stays around one chunk no
+    matter how large the file is. Small uploads that were never spooled to
+    disk are read directly."""
+
+    def __init__(self, fileobj, kind="text"):
+        self.fileobj = fileobj
+        self.kind = kind
+        self._mmap = None
+        self._data = b""
+        fileobj.seek(0, io.SEEK_END)
+        self.size = fileobj.tell()
+        fileobj.seek(0)
+        if kind == "pdf" or self.size == 0:
+            return
+        # A SpooledTemporaryFile still held in memory would be written to
+        # disk by fileno(), so read it instead
+        in_memory = getattr(fileobj, "_rolled", True) is False
+        try:
+            fileno = None if in_memory else fileobj.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            fileno = None
+        if fileno is not None:
+            self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+        else:
+            self._data = fileobj.read()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self.fileobj.close()
+
+    def chunks(self, chunk_bytes=CHUNK_BYTES):
+        """Yield the document text piece by piece: decoded UTF-8 chunks for
+        text, one page at a time for PDFs."""
+        if self.kind == "pdf":
+            yield from iter_pdf_pages(self.fileobj)
+        elif self._mmap is not None:
+            yield from iter_mapped_text(self._mmap, chunk_bytes)
+        elif self._data:
+            yield self._data.decode("utf-8", errors="replace")
+
+
+def iter_mapped_text(buffer, chunk_bytes=CHUNK_BYTES):
+    # Incremental decoding keeps multi-byte characters split across chunk
+    # boundaries intact
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    release = hasattr(mmap, "MADV_DONTNEED")
+    # madvise() needs page-aligned offsets
+    chunk_bytes = max(chunk_bytes - chunk_bytes % mmap.PAGESIZE, mmap.PAGESIZE)
+    for start in range(0, len(buffer), chunk_bytes):
+        text = decoder.decode(buffer[start:start + chunk_bytes])
+        if release:
+            # Drop the pages we've decoded from our resident set; the data
+            # stays in the page cache
+            buffer.madvise(mmap.MADV_DONTNEED, start, min(chunk_bytes, len(buffer) - start))
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_pdf_pages(fileobj):
+    # pypdf parses pages lazily, so only the page being extracted is decoded
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF uploads need the pypdf package")
+    reader = PdfReader(fileobj)
+    for page in reader.pages:
+        text = page.extract_text() or ""
+        if text:
+            yield text + "\n"
+
+
+def iter_sentences(chunks, max_sentence_chars=CHUNK_BYTES):
+    """Split a stream of text chunks into sentences, the same way
+    split_sentences() splits a whole string. Text with no sentence break
+    for `max_sentence_chars` is yielded as is to keep memory bounded."""
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        # Only a break followed by more text is final; trailing whitespace
+        # could continue in the next chunk
+        last = None
+        for match in SENTENCE_SPLIT_REGEX.finditer(text):
+            if match.end() < len(text):
+                last = match
+        if last is None:
+            if len(text) > max_sentence_chars:
+                yield text
+                text = ""
+            carry = text
+            continue
+        for sentence in SENTENCE_SPLIT_REGEX.split(text[:last.start()]):
+            if sentence.strip():
+                yield sentence
+        carry = text[last.end():]
+    for sentence in SENTENCE_SPLIT_REGEX.split(carry):
+        if sentence.strip():
+            yield sentence
+
+
+def iter_sentence_blocks(chunks):
+    """Re-cut a stream of text chunks so every piece ends on a sentence
+    boundary (or at the end of the text). Concatenating the blocks gives
+    back the original text."""
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk
+        boundary = None
+        for match in SENTENCE_SPLIT_REGEX.finditer(text, max(len(text) - BOUNDARY_SEARCH, 0)):
+            boundary = match.end()
+        if boundary is None:
+            # No break in the searched tail; emit it all rather than letting
+            # the carry grow without bound
+            boundary = len(text) if len(text) > BOUNDARY_SEARCH else 0
+        if boundary:
+            yield text[:boundary]
+        carry = text[boundary:]
+    if carry:
+        yield carry
+
+
+def read_prefix(chunks, max_chars):
+    """Collect at most `max_chars` characters; returns (text, truncated)."""
+    parts, length = [], 0
+    for chunk in chunks:
+        if length + len(chunk) > max_chars:
+            parts.append(chunk[:max_chars - length])
+            return "".join(parts), True
+        parts.append(chunk)
+        length += len(chunk)
+    return "".join(parts), False
@@ -0,0 +1,138 @@
+import json
+import os
+import re
+
+DEFAULT_CUES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "judgment_cues.json")
+
+SIDES = ("plaintiff", "defendant")
+OPPOSITE = {"plaintiff": "defendant", "defendant": "plaintiff"}
+
+# Evidence spans returned per request; scoring still uses every match
+MAX_EVIDENCE = 50
+
+
+class JudgmentScorer:
+    """Weighted plaintiff/defendant cue scoring in one pass over the facts.
+
+    Every cue phrase, cue pattern and negation word is compiled into a single
+    alternation (longest first, no capture groups so the regex engine stays
+    on its fast path). Literal matches are resolved with a dict lookup; only
+    matches that aren't a known literal are checked against the pattern
+    cues. A cue within `negation_scope` words after a negation counts for
+    the opposite side."""
+
+    def __init__(self, config):
+        self.cues = []
+        self._literal = {}
+        self._patterns = []
+        for cue in config["cues"]:
+            if cue.get("side") not in SIDES:
+                raise ValueError(f"Cue side must be one of {', '.join(SIDES)}: {cue}")
+            entry = {
+                "side": cue["side"],
+                "weight": float(cue.get("weight", 1.0)),
+                "reason": cue.get("reason", ""),
+                "cue": cue.get("phrase") or cue["pattern"],
+            }
+            self.cues.append(entry)
+            if "phrase" in cue:
+                self._literal[cue["phrase"].lower()] = entry
+            else:
+                self._patterns.append((re.compile(cue["pattern"]), entry))
+
+        self.negations = frozenset(n.lower() for n in config.get("negations", []))
+        self.negation_scope = int(config.get("negation_scope", 3))
+        # What may lie between a negation and a cue it negates: fewer than
+        # negation_scope words, separated by any whitespace
+        self._in_scope = re.compile(r"\s*(?:\S+\s+){0,%d}\S*" % max(self.negation_scope - 1, 0))
+
+        alternatives = [re.escape(phrase) for phrase in self._literal] + [p.pattern for p, _ in self._patterns]
+        alternatives += [re.escape(n) for n in self.negations if n not in self._literal]
+        # Longest literal first so "no evidence" wins over the negation "no"
+        alternatives.sort(key=len, reverse=True)
+        self._regex = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+    @classmethod
+    def from_file(cls, path=None):
+        with open(path or DEFAULT_CUES_PATH, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _resolve(self, matched):
+        entry = self._literal.get(matched)
+        if entry is not None:
+            return entry
+        for pattern, entry in self._patterns:
+            if pattern.fullmatch(matched):
+                return entry
+        return None
+
+    def score(self, facts):
+        text = facts.lower()
+        scores = {"plaintiff": 0.0, "defendant": 0.0}
+        contributions = {}
+        evidence = []
+        negation_end = None
+        for match in self._regex.finditer(text):
+            matched = match.group()
+            entry = self._resolve(matched)
+            if entry is None:
+                if matched in self.negations:
+                    negation_end = match.end()
+                continue
+
+            negated = (
+                negation_end is not None
+                and self._in_scope.fullmatch(text, negation_end, match.start()) is not None
+            )
+            side = OPPOSITE[entry["side"]] if negated else entry["side"]
+            scores[side] += entry["weight"]
+            key = (entry["cue"], negated)
+            contributions[key] = contributions.get(key, 0.0) + entry["weight"]
+            if len(evidence) < MAX_EVIDENCE:
+                evidence.append({
+                    "cue": entry["cue"],
+                    "side": side,
+                    "weight": entry["weight"],
+                    "negated": negated,
+                    "start": match.start(),
+                    "end": match.end(),
+                    "text": matched,
+                })
+            negation_end = None
+        return scores, evidence, contributions
+
+    def score_blocks(self, blocks):
+        """score() over consecutive pieces of one document, e.g. from a
+        streamed upload. Pieces should end on sentence boundaries so no cue
+        or negation is split; evidence offsets are relative to the whole
+        document."""
+        scores = {"plaintiff": 0.0, "defendant": 0.0}
+        contributions = {}
+        evidence = []
+        offset = 0
+        for block in blocks:
+            block_scores, block_evidence, block_contributions = self.score(block)
+            for side, value in block_scores.items():
+                scores[side] += value
+            for key, value in block_contributions.items():
+                contributions[key] = contributions.get(key, 0.0) + value
+            for item in block_evidence[:MAX_EVIDENCE - len(evidence)]:
+                evidence.append(dict(item, start=item["start"] + offset, end=item["end"] + offset))
+            offset += len(block)
+        return scores, evidence, contributions
+
+    def reasons(self, contributions, outcome_side, limit=3):
+        # Strongest cues that pushed towards the predicted side
+        by_cue = {entry["cue"]: entry for entry in self.cues}
+        ranked = sorted(contributions.items(), key=lambda item: -item[1])
+        reasons = []
+        for (cue, negated), total in ranked:
+            entry = by_cue[cue]
+            side = OPPOSITE[entry["side"]] if negated else entry["side"]
+            if side != outcome_side:
+                continue
+            reason = f"Negated: {entry['reason'].lower()}" if negated else entry["reason"]
+            reasons.append(f"{reason} (weight {total:g})")
+            if len(reasons) == limit:
+                break
+        return reasons
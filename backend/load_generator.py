@@ -0,0 +1,84 @@
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+from bench_statute_matcher import make_document
+
+PAYLOAD_FIELDS = {
+    "summarize": "text",
+    "predict-judgment": "facts",
+    "identify-statutes": "text",
+}
+
+
+def percentile(samples, p):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate concurrent load against the backend")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--endpoint", choices=sorted(PAYLOAD_FIELDS), default="identify-statutes")
+    parser.add_argument("--model", default="inlegalbert")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--doc-size", type=int, default=20000, help="Characters per document")
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/{args.endpoint}"
+    documents = [make_document(args.doc_size, seed=i) for i in range(32)]
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client(worker):
+        i = worker
+        while time.perf_counter() < deadline:
+            body = json.dumps({
+                PAYLOAD_FIELDS[args.endpoint]: documents[i % len(documents)],
+                "model": args.model,
+                # Measure the serving path, not the result cache
+                "cache": False,
+            }).encode()
+            req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(req, timeout=300) as resp:
+                    resp.read()
+                    status = resp.status
+            except urllib.error.HTTPError as e:
+                status = e.code
+            except Exception:
+                status = "error"
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] += 1
+                if status == 200:
+                    latencies.append(elapsed)
+            i += args.concurrency
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"Endpoint:     {url} (model={args.model}, concurrency={args.concurrency})")
+    print(f"Statuses:     {dict(statuses)}")
+    print(f"Throughput:   {len(latencies) / elapsed:.2f} successful req/s")
+    print(f"Latency p50:  {1000 * percentile(latencies, 0.50):.1f} ms")
+    print(f"Latency p99:  {1000 * percentile(latencies, 0.99):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
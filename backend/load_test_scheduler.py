@@ -0,0 +1,69 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+from inference_scheduler import GenerationScheduler
+
+SAMPLE_TEXTS = [
+    "The plaintiff filed a suit against the defendant for breach of contract. "
+    "The defendant failed to deliver the goods by the agreed date.",
+    "The appellant challenges the order of the High Court dismissing the writ petition "
+    "filed under Article 226 of the Constitution of India.",
+    "The accused was convicted under Section 302 of the Indian Penal Code. "
+    "The conviction rests entirely on circumstantial evidence.",
+    "The tenant contends that the eviction notice was not served in accordance with law "
+    "and that the landlord accepted rent after the notice period expired.",
+]
+
+GEN_KWARGS = dict(max_length=64, min_length=16, length_penalty=2.0, num_beams=4, early_stopping=True)
+
+
+def per_request(model, tokenizer):
+    # The original path: one tokenize + generate per request
+    def run(text):
+        inputs = tokenizer(text, return_tensors="pt", max_length=4096, truncation=True)
+        with torch.no_grad():
+            output_ids = model.generate(inputs["input_ids"], **GEN_KWARGS)
+        return tokenizer.decode(output_ids[0], skip_special_tokens=True)
+    return run
+
+
+def run_load(call, requests, concurrency):
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, texts))
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test Legal-LED with and without the micro-batching scheduler")
+    parser.add_argument("--model", default="nsi319/legal-led-base-16384")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"Loading {args.model}...")
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model)
+    model.eval()
+
+    rps, elapsed = run_load(per_request(model, tokenizer), args.requests, args.concurrency)
+    print(f"Per-request path: {rps:.2f} req/s ({elapsed:.1f}s for {args.requests} requests)")
+
+    scheduler = GenerationScheduler(lambda: (model, tokenizer), max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    sched_rps, elapsed = run_load(lambda text: scheduler.generate(text, **GEN_KWARGS), args.requests, args.concurrency)
+    print(f"Scheduler path:   {sched_rps:.2f} req/s ({elapsed:.1f}s for {args.requests} requests)")
+    print(f"Speedup: {sched_rps / rps:.2f}x")
+    print(f"Scheduler stats: {scheduler.stats()}")
+    scheduler.stop()
+
+
+if __name__ == "__main__":
+    main()
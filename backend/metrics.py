@@ -0,0 +1,260 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Unix only; Windows gets no peak RSS
+    resource = None
+
+# Seconds; spans regex scans on small documents up to map-reduce generation
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# (endpoint, model) of the request being handled by this thread
+_request_labels = contextvars.ContextVar("request_labels", default=("none", "none"))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield self.name + "_bucket", _format_labels(self.labelnames, key, le), cumulative
+            yield self.name + "_sum", _format_labels(self.labelnames, key), total
+            yield self.name + "_count", _format_labels(self.labelnames, key), cumulative
+
+
+class Gauge:
+    """Value read at scrape time. `collect()` returns a number, or a dict
+    mapping label value tuples to numbers. `kind="counter"` exports totals
+    that another component already keeps."""
+
+    def __init__(self, name, help, collect, labelnames=(), kind="gauge"):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self):
+        values = self.collect()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if value is not None:
+                yield self.name, _format_labels(self.labelnames, key), value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, collect, labelnames=(), kind="gauge"):
+        return self._add(Gauge(name, help, collect, labelnames, kind))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # A broken gauge callback shouldn't take down the whole scrape
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def resident_memory_bytes():
+    # Current RSS from /proc where available, else the peak (or None)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_resident_memory_bytes()
+
+
+def process_memory(pid="self"):
+    """RSS, resident shared pages and PSS of a process in bytes. PSS splits
+    shared pages between the processes mapping them, so summing it over
+    workers that share weights gives their real footprint. Linux only."""
+    page = os.sysconf("SC_PAGE_SIZE")
+    with open(f"/proc/{pid}/statm") as f:
+        fields = f.read().split()
+    usage = {"rss_bytes": int(fields[1]) * page, "shared_bytes": int(fields[2]) * page, "pss_bytes": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    usage["pss_bytes"] = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    return usage
+
+
+def peak_resident_memory_bytes():
+    # ru_maxrss is KiB on Linux; None (gauge skipped) without the resource module
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "legal_request_duration_seconds", "End-to-end request latency, including streamed bodies",
+    ("endpoint", "model", "status")
+)
+STAGE_SECONDS = metrics.histogram(
+    "legal_stage_duration_seconds", "Time spent in each stage of a request's hot path",
+    ("endpoint", "model", "stage")
+)
+TOKENS = metrics.counter(
+    "legal_tokens_total", "Model tokens consumed (in) and generated (out)",
+    ("endpoint", "model", "direction")
+)
+FALLBACKS = metrics.counter(
+    "legal_fallbacks_total", "Responses served by a fallback instead of the primary path",
+    ("endpoint", "model", "reason")
+)
+TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "legal_time_to_first_token_seconds", "Streaming latency from request start to the first token",
+    ("endpoint", "model")
+)
+metrics.gauge("process_resident_memory_bytes", "Resident set size", resident_memory_bytes)
+metrics.gauge("process_peak_resident_memory_bytes", "Peak resident set size", peak_resident_memory_bytes)
+
+
+def bind_request(endpoint, model):
+    # Stages timed in this thread are attributed to this request until the
+    # next bind; request threads are reused, so every request rebinds
+    _request_labels.set((endpoint, model))
+
+
+def unbind_request():
+    _request_labels.set(("none", "none"))
+
+
+def current_labels():
+    return _request_labels.get()
+
+
+class stage:
+    """Times a block into STAGE_SECONDS for the current request:
+
+        with stage("tokenize"):
+            ...
+
+    `labels` is an (endpoint, model) pair for work done outside the request
+    thread, e.g. by the generation scheduler."""
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels=None):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_stage(self.name, time.perf_counter() - self.started, self.labels)
+        return False
+
+
+def record_stage(name, seconds, labels=None):
+    endpoint, model = labels or _request_labels.get()
+    STAGE_SECONDS.observe(seconds, endpoint=endpoint, model=model, stage=name)
+
+
+def count_tokens(direction, count, labels=None):
+    endpoint, model = labels or _request_labels.get()
+    TOKENS.inc(count, endpoint=endpoint, model=model, direction=direction)
+
+
+def count_fallback(reason, labels=None):
+    endpoint, model = labels or _request_labels.get()
+    FALLBACKS.inc(endpoint=endpoint, model=model, reason=reason)
@@ -0,0 +1,171 @@
+import gc
+import threading
+import time
+
+UNLOADED = "unloaded"
+LOADING = "loading"
+READY = "ready"
+
+
+def _tensors(value):
+    # state_dict values are tensors, or tuples of them for packed quantized weights
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _tensors(item)
+    elif hasattr(value, "element_size"):
+        yield value
+
+
+def resident_bytes(components):
+    # Tensor bytes of every torch module among the components; storage shared
+    # between modules or tied weights is counted once
+    total = 0
+    seen = set()
+    for component in components.values():
+        if not hasattr(component, "state_dict") or not hasattr(component, "parameters"):
+            continue
+        for value in component.state_dict().values():
+            for tensor in _tensors(value):
+                key = (tensor.data_ptr(), tensor.numel())
+                if key in seen:
+                    continue
+                seen.add(key)
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class _Entry:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.state = UNLOADED
+        self.components = None
+        self.size_bytes = 0
+        self.last_used = None
+        self.load_seconds = None
+        self.last_error = None
+
+
+class ModelRegistry:
+    """Loads models on first use and evicts them when idle or over budget.
+
+    Each model is registered with a loader returning a dict of components
+    (model, tokenizer, pipelines...). Loading happens under a per-model lock
+    so concurrent first requests wait for a single load."""
+
+    def __init__(self, idle_ttl=None, memory_budget=None):
+        self.idle_ttl = idle_ttl
+        self.memory_budget = memory_budget
+        self._entries = {}
+        self._reaper = None
+
+    def register(self, name, loader):
+        self._entries[name] = _Entry(name, loader)
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Model {name} is not registered")
+        with entry.lock:
+            if entry.state != READY:
+                self._load(entry)
+            entry.last_used = time.monotonic()
+            components = entry.components
+        self._enforce_budget(keep=name)
+        return components
+
+    def _load(self, entry):
+        # Caller holds entry.lock
+        entry.state = LOADING
+        started = time.perf_counter()
+        print(f"Loading {entry.name} model...")
+        try:
+            components = entry.loader()
+        except Exception as e:
+            entry.state = UNLOADED
+            entry.last_error = str(e)
+            print(f"Error loading {entry.name} model: {str(e)}")
+            raise RuntimeError(f"Model {entry.name} failed to load: {str(e)}") from e
+        entry.components = components
+        entry.size_bytes = resident_bytes(components)
+        entry.load_seconds = time.perf_counter() - started
+        entry.last_error = None
+        entry.state = READY
+        print(f"{entry.name} model loaded successfully in {entry.load_seconds:.1f}s")
+
+    def evict(self, name, blocking=True):
+        entry = self._entries[name]
+        if not entry.lock.acquire(blocking=blocking):
+            return False
+        try:
+            if entry.state != READY:
+                return False
+            entry.components = None
+            entry.size_bytes = 0
+            entry.state = UNLOADED
+        finally:
+            entry.lock.release()
+        gc.collect()
+        print(f"Evicted {name} model")
+        return True
+
+    def _enforce_budget(self, keep=None):
+        if not self.memory_budget:
+            return
+        ready = [e for e in self._entries.values() if e.state == READY]
+        total = sum(e.size_bytes for e in ready)
+        # Evict least recently used models first, skipping ones in use by a load
+        for entry in sorted(ready, key=lambda e: e.last_used or 0):
+            if total <= self.memory_budget:
+                break
+            if entry.name == keep:
+                continue
+            size = entry.size_bytes
+            if self.evict(entry.name, blocking=False):
+                total -= size
+
+    def evict_idle(self):
+        if not self.idle_ttl:
+            return
+        now = time.monotonic()
+        for entry in list(self._entries.values()):
+            if entry.state == READY and entry.last_used is not None and now - entry.last_used > self.idle_ttl:
+                self.evict(entry.name, blocking=False)
+
+    def start_reaper(self, interval=None):
+        if not self.idle_ttl or self._reaper is not None:
+            return
+        interval = interval or min(self.idle_ttl / 2, 30)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=run, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def warm_up(self, names):
+        for name in names:
+            try:
+                self.get(name)
+            except Exception:
+                # Already logged by _load; the model will be retried on first use
+                pass
+
+    def loaded(self):
+        return [name for name, e in self._entries.items() if e.state == READY]
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            name: {
+                "state": e.state,
+                "resident_bytes": e.size_bytes,
+                "load_seconds": round(e.load_seconds, 2) if e.load_seconds is not None else None,
+                "idle_seconds": round(now - e.last_used, 1) if e.last_used is not None else None,
+                "last_error": e.last_error,
+            }
+            for name, e in self._entries.items()
+        }
@@ -0,0 +1,259 @@
+import ctypes
+import os
+import signal
+import socket
+import time
+from multiprocessing.sharedctypes import RawArray
+
+# The master preloads PREFORK_MODELS itself, after limiting its threads
+os.environ["MODEL_WARMUP"] = ""
+
+import torch  # noqa: E402
+import uvicorn  # noqa: E402
+
+import app as backend  # noqa: E402
+import serve  # noqa: E402
+from metrics import process_memory  # noqa: E402
+from model_registry import resident_bytes  # noqa: E402
+from statute_index import get_statute_index  # noqa: E402
+
+PREFORK_WORKERS = int(os.environ.get('PREFORK_WORKERS', 2))
+PREFORK_MODELS = [name.strip() for name in os.environ.get('PREFORK_MODELS', 'inlegalbert,legal-led').split(',')
+                  if name.strip()]
+# Cores are split between workers, then between each worker's request threads;
+# a worker's Legal-LED scheduler thread gets its whole slice
+CORES_PER_WORKER = max(1, (os.cpu_count() or 1) // PREFORK_WORKERS)
+WORKER_THREADS = int(os.environ.get('PREFORK_TORCH_THREADS', 0)) or max(1, CORES_PER_WORKER // serve.WORKERS)
+# Pin each worker to its own slice of cores when there are enough of them
+PIN_CPUS = os.environ.get('PREFORK_PIN_CPUS', '1') == '1'
+# A worker that dies sooner than this after starting counts as crash-looping
+MIN_UPTIME = float(os.environ.get('PREFORK_MIN_UPTIME', 10))
+MAX_BACKOFF = float(os.environ.get('PREFORK_MAX_BACKOFF', 30))
+# How often the master checks on workers while a restart is pending
+RESTART_POLL = 0.5
+
+FIELDS = ("pid", "started", "restarts", "requests", "errors", "shed", "in_flight", "last_exit")
+
+
+class WorkerTable:
+    """Per-worker stats in anonymous shared memory, so any worker can report
+    all of them on /health. The master writes pid/started/restarts/last_exit
+    and each worker writes its own request counters, so no field has more
+    than one writer."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._values = RawArray(ctypes.c_double, workers * len(FIELDS))
+
+    def _index(self, worker, field):
+        return worker * len(FIELDS) + FIELDS.index(field)
+
+    def get(self, worker, field):
+        return self._values[self._index(worker, field)]
+
+    def set(self, worker, field, value):
+        self._values[self._index(worker, field)] = value
+
+    def add(self, worker, field, delta=1):
+        self._values[self._index(worker, field)] += delta
+
+    def snapshot(self, current=None):
+        workers = []
+        now = time.time()
+        for worker in range(self.workers):
+            pid = int(self.get(worker, "pid"))
+            entry = {
+                "worker": worker,
+                "pid": pid,
+                "uptime_seconds": round(now - self.get(worker, "started"), 1) if pid else None,
+                "restarts": int(self.get(worker, "restarts")),
+                "requests": int(self.get(worker, "requests")),
+                "errors": int(self.get(worker, "errors")),
+                "shed": int(self.get(worker, "shed")),
+                "in_flight": int(self.get(worker, "in_flight")),
+                "last_exit": int(self.get(worker, "last_exit")),
+            }
+            try:
+                entry.update(process_memory(pid) if pid else {})
+            except OSError:
+                pass
+            workers.append(entry)
+        return {"current": current, "torch_threads": WORKER_THREADS,
+                "led_torch_threads": backend.led_scheduler.threads_used, "workers": workers}
+
+
+class WorkerStats:
+    """ASGI middleware counting a worker's requests in the shared table.
+    Requests the load shedder turns away count as shed, not as errors.
+    asyncio runs it on one thread, so the counters need no lock."""
+
+    def __init__(self, app, table, worker):
+        self.app = app
+        self.table = table
+        self.worker = worker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                if scope.get("load_shed"):
+                    self.table.add(self.worker, "shed")
+                elif message["status"] >= 500:
+                    self.table.add(self.worker, "errors")
+            await send(message)
+
+        self.table.add(self.worker, "requests")
+        self.table.add(self.worker, "in_flight")
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            self.table.add(self.worker, "in_flight", -1)
+
+
+def share_models(names):
+    """Load the models once in the master and move their weights to shared
+    memory, so forked workers map the same pages instead of each getting a
+    copy-on-write copy that any write would duplicate. Packed int8 weights
+    aren't regular parameters; they stay copy-on-write shared."""
+    for name in names:
+        components = backend.registry.get(name)
+        for component in components.values():
+            if isinstance(component, torch.nn.Module):
+                component.share_memory()
+        print(f"Shared {name} weights ({resident_bytes(components) / 2 ** 20:.0f} MB) with the workers")
+
+
+def pin_worker(worker):
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not PIN_CPUS or len(cores) < PREFORK_WORKERS * CORES_PER_WORKER:
+        return None
+    pinned = cores[worker * CORES_PER_WORKER:(worker + 1) * CORES_PER_WORKER]
+    os.sched_setaffinity(0, pinned)
+    return pinned
+
+
+def run_worker(worker, sock, table):
+    # uvicorn installs its own SIGINT/SIGTERM handlers for graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    pinned = pin_worker(worker)
+    serve.TORCH_THREADS = WORKER_THREADS
+    # serve defaults the scheduler to every core; a worker only has its slice
+    backend.led_scheduler.num_threads = int(os.environ.get('LED_TORCH_THREADS', 0)) or CORES_PER_WORKER
+    backend.led_scheduler.restart_after_fork()
+    backend.result_cache.reopen()
+    backend.health_sections["prefork"] = lambda: table.snapshot(current=worker)
+    print(f"Worker {worker} (pid {os.getpid()}) serving with {WORKER_THREADS} torch threads"
+          + (f" on cores {pinned}" if pinned else ""))
+
+    config = uvicorn.Config(WorkerStats(serve.asgi_app, table, worker), log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks the workers and restarts any that exit, backing off when a
+    worker keeps dying right after it starts."""
+
+    def __init__(self, sock, workers):
+        self.sock = sock
+        self.table = WorkerTable(workers)
+        self.workers = workers
+        self.children = {}  # pid -> worker index
+        self.failures = [0] * workers
+        self.restart_at = {}  # worker index -> time its restart is due
+        self.stopping = False
+
+    def spawn(self, worker):
+        for field in ("requests", "errors", "shed", "in_flight"):
+            self.table.set(worker, field, 0)
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(worker, self.sock, self.table)
+            except BaseException as e:
+                print(f"Worker {worker} failed: {str(e)}")
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = worker
+        self.table.set(worker, "pid", pid)
+        self.table.set(worker, "started", time.time())
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker in range(self.workers):
+            self.spawn(worker)
+
+        while self.children or self.restart_at:
+            if self.stopping:
+                self.restart_at.clear()
+            # Restarts are scheduled rather than slept through, so one worker
+            # backing off doesn't hold up reaping and restarting the others
+            now = time.time()
+            for worker, due in list(self.restart_at.items()):
+                if due <= now:
+                    del self.restart_at[worker]
+                    self.spawn(worker)
+            try:
+                if self.restart_at:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                else:
+                    pid, status = os.wait()
+            except ChildProcessError:
+                if not self.restart_at:
+                    break
+                pid = 0
+            if pid == 0:
+                time.sleep(max(0, min(RESTART_POLL, min(self.restart_at.values(), default=0) - time.time())))
+                continue
+            worker = self.children.pop(pid, None)
+            if worker is None or self.stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            uptime = time.time() - self.table.get(worker, "started")
+            self.table.set(worker, "last_exit", code)
+            self.table.add(worker, "restarts")
+            self.failures[worker] = self.failures[worker] + 1 if uptime < MIN_UPTIME else 0
+            delay = min(2 ** (self.failures[worker] - 1), MAX_BACKOFF) if self.failures[worker] else 0
+            print(f"Worker {worker} (pid {pid}) exited with {code} after {uptime:.0f}s; restarting in {delay:.0f}s")
+            self.table.set(worker, "pid", 0)
+            self.restart_at[worker] = time.time() + delay
+
+
+def main():
+    # Nothing may start an OpenMP thread pool before fork(): a child would
+    # inherit a pool whose threads don't exist and hang in its first op
+    torch.set_num_threads(1)
+    # Workers never evict or reload: a reloaded model would be a private copy
+    backend.registry.idle_ttl = None
+    backend.registry.memory_budget = None
+    share_models(PREFORK_MODELS)
+    # The statute index and section embeddings are mmap'd and the IVF lists
+    # are built once here, so the workers share those pages too
+    get_statute_index()
+    if backend.semantic_finder.available():
+        backend.semantic_finder.retriever()
+
+    port = int(os.environ.get('PORT', 5000))
+    sock = socket.create_server(("0.0.0.0", port), backlog=2048)
+    print(f"Pre-fork master (pid {os.getpid()}) starting {PREFORK_WORKERS} workers on port {port}")
+    Supervisor(sock, PREFORK_WORKERS).run()
+    sock.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import cProfile
+import os
+import random
+import threading
+import time
+
+PROFILERS = ("cprofile", "torch")
+
+# Python profilers are process-wide, so only one request is profiled at a time
+_active = threading.Lock()
+
+
+class RequestProfiler:
+    """Profiles a single request and writes the trace to `directory`.
+
+    cProfile output (.prof) covers the request thread: parsing, tokenization,
+    regex scans, embedding and serialization. Generation that runs on the
+    scheduler thread shows up as time waiting on its future; use the torch
+    profiler (.json Chrome trace) to see the operators inside generate()."""
+
+    def __init__(self, kind, directory, name):
+        self.kind = kind
+        extension = ".json" if kind == "torch" else ".prof"
+        self.path = os.path.join(
+            directory,
+            f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{threading.get_ident()}{extension}"
+        )
+        self._profiler = None
+
+    def start(self):
+        if self.kind == "torch":
+            import torch
+            self._profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True
+            )
+            self._profiler.__enter__()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self):
+        try:
+            if self.kind == "torch":
+                self._profiler.__exit__(None, None, None)
+                self._profiler.export_chrome_trace(self.path)
+            else:
+                self._profiler.disable()
+                self._profiler.dump_stats(self.path)
+            return self.path
+        finally:
+            _active.release()
+
+
+def maybe_profile(kind, directory, sample_rate, name):
+    """Start a profiler for this request if profiling is enabled, the kind is
+    known, the request is sampled and no other request is being profiled.
+    Returns the running RequestProfiler or None."""
+    if not directory or kind not in PROFILERS or random.random() >= sample_rate:
+        return None
+    if not _active.acquire(blocking=False):
+        return None
+    profiler = RequestProfiler(kind, directory, name)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.start()
+    except Exception as e:
+        _active.release()
+        print(f"Error starting {kind} profiler: {str(e)}")
+        return None
+    return profiler
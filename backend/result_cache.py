@@ -0,0 +1,132 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    # Whitespace-only edits shouldn't miss the cache
+    return " ".join(text.split())
+
+
+def make_key(endpoint, model_name, text, params=None, normalize=True):
+    # Results that depend on the text's whitespace need normalize=False
+    payload = json.dumps(
+        [endpoint, model_name, normalize_text(text) if normalize else text, params or {}],
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed store so cached results survive restarts."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def reopen(self):
+        # SQLite connections must not be used across fork(); a forked worker
+        # opens its own and never touches the inherited one
+        self._inherited = self._conn
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+class ResultCache:
+    """Content-addressed cache of endpoint results.
+
+    The memory tier is an LRU bounded by the total size of the serialized
+    results; the optional disk tier is consulted on a memory miss and
+    promotes hits back into memory."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_path=None):
+        self.max_bytes = max_bytes
+        self.disk = DiskTier(disk_path) if disk_path else None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, endpoint, outcome):
+        counters = self._counters.setdefault(endpoint, {"hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0})
+        counters[outcome] += 1
+
+    def _store(self, key, value):
+        # Caller holds the lock
+        if len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = value
+        self._bytes += len(value)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def get(self, endpoint, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._count(endpoint, "hits")
+                return json.loads(value)
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                with self._lock:
+                    self._store(key, value)
+                    self._count(endpoint, "disk_hits")
+                return json.loads(value)
+        with self._lock:
+            self._count(endpoint, "misses")
+        return None
+
+    def put(self, key, result):
+        value = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._store(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def reopen(self):
+        if self.disk is not None:
+            self.disk.reopen()
+
+    def record_bypass(self, endpoint):
+        with self._lock:
+            self._count(endpoint, "bypassed")
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "endpoints": {name: dict(c) for name, c in self._counters.items()},
+            }
+        if self.disk is not None:
+            stats["disk_entries"] = self.disk.count()
+        return stats
@@ -0,0 +1,99 @@
+import os
+
+import torch
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from flask import jsonify
+
+# Split the cores between the request workers so concurrent inference calls
+# don't oversubscribe the CPU. Only the request threads are capped: the
+# Legal-LED scheduler runs one batched generate at a time on its own thread
+# and uses its own count (LED_TORCH_THREADS, default one per core).
+WORKERS = int(os.environ.get('INFERENCE_WORKERS', 4))
+TORCH_THREADS = int(os.environ.get('TORCH_THREADS', 0)) or max(1, (os.cpu_count() or 1) // WORKERS)
+
+from app import app, led_scheduler  # noqa: E402
+
+# Set explicitly: the request threads change torch's thread count, so the
+# scheduler can't rely on the default
+led_scheduler.num_threads = led_scheduler.num_threads or os.cpu_count()
+
+
+def capped_threads(wsgi_app):
+    # torch's thread count is process-wide and the Legal-LED scheduler sets
+    # its own before every batch, so each request sets TORCH_THREADS again.
+    # TORCH_THREADS is read per call because a pre-fork worker replaces it.
+    def wrapped(environ, start_response):
+        torch.set_num_threads(TORCH_THREADS)
+        return wsgi_app(environ, start_response)
+    return wrapped
+
+
+# Requests allowed to wait for a free worker before new ones are shed
+MAX_QUEUE = int(os.environ.get('MAX_QUEUE', 16))
+RETRY_AFTER = int(os.environ.get('RETRY_AFTER_SECONDS', 5))
+
+# Paths that are always served, even when the server is saturated
+UNLIMITED_PATHS = {"/health", "/health/serving", "/metrics"}
+
+
+class LoadShedder:
+    """ASGI middleware that rejects requests with 503 and Retry-After once
+    every worker is busy and the wait queue is full."""
+
+    def __init__(self, app, limit):
+        self.app = app
+        self.limit = limit
+        self.in_flight = 0
+        self.shed = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNLIMITED_PATHS:
+            await self.app(scope, receive, send)
+            return
+        if self.in_flight >= self.limit:
+            self.shed += 1
+            # Lets outer middleware tell a shed request from a failed one
+            scope["load_shed"] = True
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", str(RETRY_AFTER).encode()),
+                ],
+            })
+            await send({
+                "type": "http.response.body",
+                "body": b'{"error": "Server is overloaded, retry later", "success": false}',
+            })
+            return
+        # asyncio runs this on one thread, so the counter needs no lock
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+# The Flask app runs on a bounded thread pool behind the ASGI server
+asgi_app = LoadShedder(WSGIMiddleware(capped_threads(app), workers=WORKERS), limit=WORKERS + MAX_QUEUE)
+
+
+@app.route('/health/serving', methods=['GET'])
+def serving_health():
+    return jsonify({
+        "workers": WORKERS,
+        # Read back from torch in this request thread
+        "torch_threads": torch.get_num_threads(),
+        # Read back in the scheduler thread before its last batch
+        "led_torch_threads": led_scheduler.threads_used,
+        "in_flight": asgi_app.in_flight,
+        "max_queue": MAX_QUEUE,
+        "shed": asgi_app.shed
+    })
+
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5000))
+    uvicorn.run(asgi_app, host='0.0.0.0', port=port, log_level="info")
@@ -0,0 +1,174 @@
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from collections import Counter
+
+# On-disk layout: magic, little-endian header length, JSON header, then the
+# UTF-8 section texts back to back. The header holds everything needed for
+# lookups and BM25 scoring; section text is only read from the mmap when a
+# result is returned.
+MAGIC = b"LGSI1\0"
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "statute_index.bin")
+DEFAULT_SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "statutes.json")
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+TOKEN_REGEX = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and any as at be by for from has his in is it of on or shall such that the to under "
+    "which who whoever with".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_REGEX.findall(text.lower()) if t not in STOPWORDS]
+
+
+def normalize_alias(name):
+    # "I.P.C." and "IPC" both become "ipc"
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def normalize_section(number):
+    return re.sub(r"\s+", "", number).upper()
+
+
+def build_index(source_path, index_path):
+    """Build the compact index from the JSON statute source. Offline step."""
+    with open(source_path, encoding="utf-8") as f:
+        source = json.load(f)
+
+    statutes, aliases, sections, postings = [], {}, [], {}
+    blob = bytearray()
+    for statute_idx, statute in enumerate(source["statutes"]):
+        statutes.append({"id": statute["id"], "name": statute["name"]})
+        for alias in [statute["name"], statute["id"]] + statute.get("aliases", []):
+            aliases[normalize_alias(alias)] = statute_idx
+        for section in statute["sections"]:
+            section_idx = len(sections)
+            text = section["text"].encode("utf-8")
+            terms = tokenize(section["title"] + " " + section["text"])
+            sections.append([
+                statute_idx, normalize_section(section["number"]), section["title"],
+                len(blob), len(text), len(terms)
+            ])
+            blob.extend(text)
+            for term, tf in Counter(terms).items():
+                postings.setdefault(term, []).append([section_idx, tf])
+
+    header = json.dumps({
+        "statutes": statutes,
+        "aliases": aliases,
+        "sections": sections,
+        "postings": postings,
+        "avgdl": sum(s[5] for s in sections) / max(len(sections), 1),
+    }, separators=(",", ":")).encode("utf-8")
+    with open(index_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(blob)
+    return len(statutes), len(sections)
+
+
+class StatuteIndex:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a statute index")
+        offset = len(MAGIC)
+        (header_len,) = struct.unpack_from("<Q", self._mmap, offset)
+        offset += 8
+        header = json.loads(self._mmap[offset:offset + header_len])
+        self._blob_offset = offset + header_len
+
+        self.statutes = header["statutes"]
+        self.aliases = header["aliases"]
+        self.sections = header["sections"]
+        self.postings = header["postings"]
+        self.avgdl = header["avgdl"]
+        self._by_section = {(s[0], s[1]): i for i, s in enumerate(self.sections)}
+
+    def resolve(self, name):
+        """Statute index for a name or alias (IPC, I.P.C., Indian Penal Code...)."""
+        return self.aliases.get(normalize_alias(name))
+
+    def section_text(self, section_idx):
+        start, length = self.sections[section_idx][3], self.sections[section_idx][4]
+        start += self._blob_offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def entry(self, section_idx, with_text=True):
+        statute_idx, number, title = self.sections[section_idx][:3]
+        entry = {
+            "statute": self.statutes[statute_idx]["name"],
+            "section": number,
+            "title": title,
+        }
+        if with_text:
+            entry["text"] = self.section_text(section_idx)
+        return entry
+
+    def lookup(self, statute, number, with_text=False):
+        statute_idx = self.resolve(statute)
+        if statute_idx is None:
+            return None
+        section_idx = self._by_section.get((statute_idx, normalize_section(number)))
+        if section_idx is None:
+            return None
+        return self.entry(section_idx, with_text)
+
+    def search(self, query, limit=10, statute=None):
+        """BM25-ranked sections for a free-text query."""
+        statute_idx = self.resolve(statute) if statute else None
+        if statute and statute_idx is None:
+            return []
+        n = len(self.sections)
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for section_idx, tf in postings:
+                if statute_idx is not None and self.sections[section_idx][0] != statute_idx:
+                    continue
+                doc_len = self.sections[section_idx][5]
+                score = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_len / self.avgdl))
+                scores[section_idx] = scores.get(section_idx, 0.0) + score
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [dict(self.entry(i), score=round(score, 4)) for i, score in ranked]
+
+    def annotate(self, found_statutes):
+        # Replace the generic relevance text with the real section title
+        for entry in found_statutes:
+            if not entry["section"].startswith("Section "):
+                continue
+            match = self.lookup(entry["name"], entry["section"][len("Section "):])
+            if match:
+                entry["relevance"] = f"{entry['section']} of the {entry['name']}: {match['title']}"
+        return found_statutes
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_statute_index(path=None):
+    """Load the index on first use; returns None when it hasn't been built."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = path or os.environ.get("STATUTE_INDEX_PATH", DEFAULT_INDEX_PATH)
+                if not os.path.exists(path):
+                    return None
+                _index = StatuteIndex(path)
+    return _index
@@ -0,0 +1,254 @@
+import re
+from bisect import bisect_left
+
+# Common Indian statutes and their patterns
+STATUTE_PATTERNS = [
+    (r"Indian Penal Code|IPC|I\.P\.C\.", "Indian Penal Code"),
+    (r"Code of Criminal Procedure|CrPC|Cr\.P\.C\.", "Code of Criminal Procedure"),
+    (r"Code of Civil Procedure|CPC|C\.P\.C\.", "Code of Civil Procedure"),
+    (r"Constitution of India", "Constitution of India"),
+    (r"Indian Contract Act", "Indian Contract Act"),
+    (r"Indian Evidence Act", "Indian Evidence Act"),
+    (r"Companies Act", "Companies Act"),
+    (r"Income Tax Act", "Income Tax Act"),
+    (r"Goods and Services Tax|GST", "Goods and Services Tax Act"),
+    (r"Specific Relief Act", "Specific Relief Act"),
+    (r"Transfer of Property Act", "Transfer of Property Act"),
+    (r"Hindu Marriage Act", "Hindu Marriage Act"),
+    (r"Muslim Personal Law", "Muslim Personal Law"),
+    (r"Arbitration and Conciliation Act", "Arbitration and Conciliation Act"),
+    (r"Information Technology Act|IT Act", "Information Technology Act"),
+    (r"Bharatiya Nyaya Sanhita|BNS", "Bharatiya Nyaya Sanhita")
+]
+
+# Section pattern (kept for reference, the matcher splits it into head and tail)
+SECTION_PATTERN = r"[Ss]ection\s+(\d+[A-Za-z]*)(?:\s+of\s+the\s+([A-Za-z\s]+))?"
+
+# How far (in characters) a statute mention may sit from a section reference
+CONTEXT_WINDOW = 100
+
+# All statute aliases and the section head compiled once into a single
+# alternation; each alternative is a named group so one finditer pass tells
+# us both what matched and where.
+STATUTE_NAMES = [name for _, name in STATUTE_PATTERNS]
+# Every alias starts with a plain letter, so a leading lookahead on the set of
+# first letters lets the regex engine skip non-candidate positions quickly
+# instead of trying all alternatives at every character.
+_LEADING_CHARS = "Ss" + "".join(sorted({
+    alias[0] for pattern, _ in STATUTE_PATTERNS for alias in pattern.split("|")
+}))
+_COMBINED_REGEX = re.compile(
+    f"(?=[{_LEADING_CHARS}])(?:"
+    r"(?P<section>[Ss]ection\s+(?P<section_num>\d+[A-Za-z]*))|"
+    + "|".join(f"(?P<s{i}>{pattern})" for i, (pattern, _) in enumerate(STATUTE_PATTERNS))
+    + ")"
+)
+# Optional "of the <Act name>" tail. SECTION_PATTERN matches it greedily, so
+# a section's context window is measured from the end of the tail, and a
+# section head swallowed by the previous section's tail isn't a match.
+_SECTION_TAIL_REGEX = re.compile(r"\s+of\s+the\s+[A-Za-z\s]+")
+
+
+def _scan(text, skip_until=0):
+    # Like scan_spans, plus where the regex match itself ended; a section's
+    # span extends over its tail, which can contain statute mentions.
+    # Section heads starting before `skip_until` are inside an earlier tail.
+    for match in _COMBINED_REGEX.finditer(text):
+        group = match.lastgroup
+        if group == "section":
+            if match.start() < skip_until:
+                continue
+            tail = _SECTION_TAIL_REGEX.match(text, match.end())
+            skip_until = tail.end() if tail else match.end()
+            yield "section", match.group("section_num"), match.start(), match.end(), skip_until
+        else:
+            yield "statute", int(group[1:]), match.start(), match.end(), match.end()
+
+
+def scan_spans(text):
+    """Yield ("statute", index, start, end) and ("section", number, start, end)
+    tuples in a single left-to-right pass over the text. A section's end
+    includes its "of the <Act>" tail."""
+    for kind, value, start, _, end in _scan(text):
+        yield kind, value, start, end
+
+
+class SpanIndex:
+    """Sorted statute mention spans with window lookup."""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.statutes = []
+
+    def add(self, statute, start, end):
+        # scan_spans yields in text order, so appending keeps starts sorted
+        self.starts.append(start)
+        self.ends.append(end)
+        self.statutes.append(statute)
+
+    def within(self, start, end, window=CONTEXT_WINDOW):
+        """Return the set of statutes with a mention lying entirely within
+        `window` characters of [start, end), as the original matcher's
+        context slice did."""
+        lo, hi = start - window, end + window
+        statutes = set()
+        j = bisect_left(self.starts, lo)
+        while j < len(self.starts) and self.starts[j] < hi:
+            if self.ends[j] <= hi:
+                statutes.add(self.statutes[j])
+            j += 1
+        return statutes
+
+
+def match_statutes(text):
+    """Identify statutes and their sections in `text`.
+
+    Returns entries in the same shape the /identify-statutes endpoint has
+    always returned (without the default fallback), ordered by statute and
+    then by position of the section in the text."""
+    return link_statutes(scan_spans(text))
+
+
+def link_statutes(spans):
+    """Build match_statutes() entries from scan_spans() output, which may
+    come from several pieces of a document shifted to absolute offsets."""
+    index = SpanIndex()
+    sections = []
+    for kind, value, start, end in spans:
+        if kind == "statute":
+            index.add(value, start, end)
+        else:
+            sections.append((value, start, end))
+
+    found = set(index.statutes)
+    linked = {statute: [] for statute in found}
+    # A section counts for every statute mentioned in its context window,
+    # including the one named in its own "of the <Act>" tail
+    for section_num, start, end in sections:
+        for statute in index.within(start, end):
+            linked[statute].append(section_num)
+
+    found_statutes = []
+    for statute in sorted(found):
+        name = STATUTE_NAMES[statute]
+        # If no specific sections found, just note the statute
+        if not linked[statute]:
+            found_statutes.append({
+                "id": str(len(found_statutes) + 1),
+                "name": name,
+                "section": "General reference",
+                "relevance": f"The document references the {name}"
+            })
+            continue
+        # Add each section as a separate entry
+        for section in linked[statute]:
+            found_statutes.append({
+                "id": str(len(found_statutes) + 1),
+                "name": name,
+                "section": f"Section {section}",
+                "relevance": f"The document references Section {section} of the {name}"
+            })
+    return found_statutes
+
+
+# Characters held back at the end of each chunk so a match (or the
+# "of the <Act>" tail that sizes its context window) isn't cut in two
+STREAM_OVERLAP = 1024
+# The tail has no fixed length: a section whose tail runs to the end of the
+# buffer is scanned again with the next chunk, until it is this long
+STREAM_MAX_DEFERRED = 64 * 1024
+
+
+class StatuteScanner:
+    """match_statutes() over text that arrives in chunks.
+
+    Memory stays proportional to the chunk size plus the distinct
+    (statute, section) pairs found, so repeated citations are aggregated
+    into one entry with an occurrence count instead of one entry each.
+    Results match match_statutes() unless a section's "of the <Act>" tail
+    is longer than STREAM_MAX_DEFERRED or a citation contains a whitespace
+    run longer than STREAM_OVERLAP."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._offset = 0  # absolute position of _buffer[0]
+        self._skip_until = 0  # absolute end of the last section's tail
+        self._index = SpanIndex()
+        self._pending = []  # sections waiting for their right-hand context
+        self._found = set()
+        self._linked = {}  # statute -> {section: occurrences}, in first-seen order
+
+    def feed(self, chunk, final=False):
+        text = self._buffer + chunk
+        limit = len(text) if final else max(len(text) - STREAM_OVERLAP, 0)
+        cut = limit
+        for kind, value, start, match_end, end in _scan(text, self._skip_until - self._offset):
+            if start >= limit:
+                break
+            if (kind == "section" and not final and end == len(text)
+                    and len(text) - start <= STREAM_MAX_DEFERRED):
+                # The tail may go on in the next chunk
+                cut = start
+                break
+            cut = max(cut, match_end)
+            if kind == "statute":
+                self._index.add(value, self._offset + start, self._offset + end)
+                self._found.add(value)
+            else:
+                self._pending.append((value, self._offset + start, self._offset + end))
+                self._skip_until = self._offset + end
+        self._buffer = text[cut:]
+        self._offset += cut
+        self._resolve(self._offset if not final else None)
+
+    def _resolve(self, scanned_to):
+        # A section can be linked once every mention that could fall inside
+        # its context window has been scanned
+        while self._pending:
+            section_num, start, end = self._pending[0]
+            if scanned_to is not None and end + CONTEXT_WINDOW > scanned_to:
+                break
+            self._pending.pop(0)
+            for statute in self._index.within(start, end):
+                sections = self._linked.setdefault(statute, {})
+                sections[section_num] = sections.get(section_num, 0) + 1
+
+        # Forget mentions too far back to be near any section still to come
+        horizon = (self._pending[0][1] if self._pending else self._offset) - CONTEXT_WINDOW
+        drop = bisect_left(self._index.starts, horizon)
+        if drop > 1024:
+            del self._index.starts[:drop], self._index.ends[:drop], self._index.statutes[:drop]
+
+    def results(self):
+        found_statutes = []
+        for statute in sorted(self._found):
+            name = STATUTE_NAMES[statute]
+            sections = self._linked.get(statute)
+            if not sections:
+                found_statutes.append({
+                    "id": str(len(found_statutes) + 1),
+                    "name": name,
+                    "section": "General reference",
+                    "relevance": f"The document references the {name}"
+                })
+                continue
+            for section, occurrences in sections.items():
+                found_statutes.append({
+                    "id": str(len(found_statutes) + 1),
+                    "name": name,
+                    "section": f"Section {section}",
+                    "relevance": f"The document references Section {section} of the {name}",
+                    "occurrences": occurrences
+                })
+        return found_statutes
+
+
+def match_statutes_stream(chunks):
+    """match_statutes() for an iterable of text chunks, with repeated
+    citations aggregated (see StatuteScanner)."""
+    scanner = StatuteScanner()
+    for chunk in chunks:
+        scanner.feed(chunk)
+    scanner.feed("", final=True)
+    return scanner.results()
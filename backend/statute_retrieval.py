@@ -0,0 +1,167 @@
+import os
+import threading
+
+import numpy as np
+
+from extractive import embed_sentences, split_sentences
+from metrics import stage
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_EMBEDDINGS_PATH = os.path.join(DATA_DIR, "statute_embeddings.npy")
+DEFAULT_IVF_PATH = os.path.join(DATA_DIR, "statute_ivf.npz")
+
+# Rows scored per block so the float32 copy of a float16 memmap stays small
+BLOCK_ROWS = 65536
+
+
+def section_passages(statute_index):
+    # What gets embedded for each section, in section index order
+    return [
+        f"{entry['statute']} section {entry['section']}: {entry['title']}. {entry['text']}"
+        for entry in (statute_index.entry(i) for i in range(len(statute_index.sections)))
+    ]
+
+
+def chunk_document(text, sentences_per_chunk=3):
+    sentences = split_sentences(text)
+    return [
+        " ".join(sentences[i:i + sentences_per_chunk])
+        for i in range(0, len(sentences), sentences_per_chunk)
+    ]
+
+
+def top_k(scores, k):
+    # argpartition is O(n); only the k winners get sorted
+    k = min(k, len(scores))
+    if k == 0:
+        return np.array([], dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def kmeans(matrix, nlist, iterations=20, seed=0):
+    """Spherical k-means on unit vectors, used to build the IVF lists."""
+    rng = np.random.default_rng(seed)
+    data = np.asarray(matrix, dtype=np.float32)
+    centroids = data[rng.choice(len(data), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = np.argmax(data @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = data[assignments == c]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[c] = centroid / max(np.linalg.norm(centroid), 1e-12)
+    return centroids, np.argmax(data @ centroids.T, axis=1)
+
+
+class SectionRetriever:
+    """Top-k similarity search over precomputed section embeddings.
+
+    The embedding matrix is a float16 .npy opened as a read-only memmap. An
+    optional IVF index (k-means centroids plus per-list row ids) limits the
+    search to the `nprobe` closest lists for large corpora."""
+
+    def __init__(self, embeddings_path, ivf_path=None, nprobe=8):
+        self.matrix = np.load(embeddings_path, mmap_mode="r")
+        self.nprobe = nprobe
+        self.centroids = None
+        self.lists = None
+        if ivf_path and os.path.exists(ivf_path):
+            ivf = np.load(ivf_path)
+            self.centroids = ivf["centroids"]
+            assignments = ivf["assignments"]
+            order = np.argsort(assignments, kind="stable")
+            bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+            self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+
+    def _candidates(self, queries):
+        if self.centroids is None:
+            return None
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.nprobe]
+        return np.unique(np.concatenate([self.lists[c] for c in np.unique(probes)]))
+
+    def search(self, queries, k=5):
+        """Return (row ids, scores) of the k sections most similar to any of
+        the query vectors (each row of `queries` is one document chunk)."""
+        queries = np.asarray(queries, dtype=np.float32)
+        candidates = self._candidates(queries)
+        if candidates is not None:
+            rows = np.asarray(self.matrix[candidates], dtype=np.float32)
+            best = (rows @ queries.T).max(axis=1)
+            order = top_k(best, k)
+            return candidates[order], best[order]
+
+        best = np.empty(len(self.matrix), dtype=np.float32)
+        for start in range(0, len(self.matrix), BLOCK_ROWS):
+            block = np.asarray(self.matrix[start:start + BLOCK_ROWS], dtype=np.float32)
+            best[start:start + len(block)] = (block @ queries.T).max(axis=1)
+        order = top_k(best, k)
+        return order, best[order]
+
+
+class SemanticStatuteFinder:
+    """Finds statute sections a document relates to without naming them."""
+
+    def __init__(self, load_model, get_index, embeddings_path=None, ivf_path=None,
+                 min_score=0.5, batch_size=32):
+        self.load_model = load_model
+        self.get_index = get_index
+        self.embeddings_path = embeddings_path or DEFAULT_EMBEDDINGS_PATH
+        self.ivf_path = ivf_path or DEFAULT_IVF_PATH
+        self.min_score = min_score
+        self.batch_size = batch_size
+        self._retriever = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        return os.path.exists(self.embeddings_path) and self.get_index() is not None
+
+    def retriever(self):
+        if self._retriever is None:
+            with self._lock:
+                if self._retriever is None:
+                    self._retriever = SectionRetriever(self.embeddings_path, self.ivf_path)
+        return self._retriever
+
+    def find(self, text, k=5):
+        statute_index = self.get_index()
+        chunks = chunk_document(text)
+        if not chunks or statute_index is None:
+            return []
+        retriever = self.retriever()
+        if len(retriever.matrix) != len(statute_index.sections):
+            raise RuntimeError("Statute embeddings are out of date, rerun build_statute_embeddings.py")
+        model, tokenizer = self.load_model()
+        with stage("embed"):
+            queries = embed_sentences(model, tokenizer, chunks, batch_size=self.batch_size, max_length=256)
+        with stage("retrieve"):
+            rows, scores = retriever.search(queries, k)
+        results = []
+        for row, score in zip(rows, scores):
+            if score < self.min_score:
+                continue
+            entry = statute_index.entry(int(row), with_text=False)
+            entry["score"] = round(float(score), 4)
+            results.append(entry)
+        return results
+
+
+def merge_statutes(found_statutes, semantic_hits):
+    """Append semantic hits that the regex matcher didn't already report,
+    in the /identify-statutes entry shape, and renumber the ids."""
+    seen = {(entry["name"], entry["section"]) for entry in found_statutes}
+    merged = list(found_statutes)
+    for hit in semantic_hits:
+        key = (hit["statute"], f"Section {hit['section']}")
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append({
+            "id": "",
+            "name": hit["statute"],
+            "section": key[1],
+            "relevance": f"{key[1]} of the {hit['statute']}: {hit['title']} (semantic match, score {hit['score']:.2f})"
+        })
+    for i, entry in enumerate(merged, 1):
+        entry["id"] = str(i)
+    return merged
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+from metrics import TIME_TO_FIRST_TOKEN, count_tokens, current_labels, record_stage, stage
+
+
+class LatencyStats:
+    """Running latency summary (count, mean, p50, p95, max) over a bounded window."""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self._samples = []
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._count += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+            self._samples.append(seconds)
+            if len(self._samples) > self.window:
+                del self._samples[0]
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total, peak = self._count, self._total, self._max
+        if not samples:
+            return {"count": 0}
+
+        def pct(p):
+            return round(1000 * samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "count": count,
+            "avg_ms": round(1000 * total / count, 2),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(1000 * peak, 2),
+        }
+
+
+# Time from request start to the first streamed token
+time_to_first_token = LatencyStats()
+
+
+class CountingStreamer(TextIteratorStreamer):
+    # Counts generated token ids as they pass through to the text decoder
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.generated_tokens = 0
+
+    def put(self, value):
+        if not (self.skip_prompt and self.next_tokens_are_prompt):
+            self.generated_tokens += value.numel()
+        super().put(value)
+
+
+class CancelGeneration(StoppingCriteria):
+    # Stops generate() at the next step once the consumer has gone away
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def __call__(self, input_ids, scores, **kwargs):
+        return self.cancelled.is_set()
+
+
+def streaming_kwargs(gen_kwargs, sample=False):
+    # Beam search can't stream token by token, so streaming uses greedy or
+    # nucleus sampling with the same length limits
+    kwargs = {
+        "max_length": gen_kwargs["max_length"],
+        "min_length": gen_kwargs.get("min_length", 0),
+        "num_beams": 1,
+        "do_sample": sample,
+    }
+    if sample:
+        kwargs.update(top_p=0.9, temperature=0.7)
+    return kwargs
+
+
+def stream_generate(model, tokenizer, text, gen_kwargs, max_input_length=4096, started=None):
+    """Run generate() in a background thread and yield decoded text pieces
+    as the model produces them. Time to first token is measured from
+    `started` (the request's arrival), or from this call when not given.
+    Closing the generator early, e.g. when the client disconnects, stops
+    generation at the next decoding step."""
+    if started is None:
+        started = time.perf_counter()
+    with stage("tokenize"):
+        inputs = tokenizer(text, return_tensors="pt", max_length=max_input_length, truncation=True)
+    streamer = CountingStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    cancel = CancelGeneration()
+    errors = []
+
+    def run():
+        try:
+            with torch.inference_mode():
+                model.generate(
+                    inputs["input_ids"],
+                    attention_mask=inputs["attention_mask"],
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([cancel]),
+                    **gen_kwargs
+                )
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer loop below
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="led-stream", daemon=True)
+    generate_started = time.perf_counter()
+    thread.start()
+    first = True
+    try:
+        for piece in streamer:
+            if not piece:
+                continue
+            if first:
+                elapsed = time.perf_counter() - started
+                time_to_first_token.record(elapsed)
+                endpoint, model_name = current_labels()
+                TIME_TO_FIRST_TOKEN.observe(elapsed, endpoint=endpoint, model=model_name)
+                first = False
+            yield piece
+    finally:
+        # A no-op after a normal finish; on early close the generate thread
+        # would otherwise keep decoding for nobody
+        cancel.cancelled.set()
+    thread.join()
+    record_stage("generate", time.perf_counter() - generate_started)
+    count_tokens("in", inputs["input_ids"].shape[1])
+    count_tokens("out", streamer.generated_tokens)
+    if errors:
+        raise errors[0]
@@ -0,0 +1,206 @@
+import time
+import zlib
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+# Overlap between consecutive windows so sentences cut at a boundary still
+# appear whole in one of the chunks
+DEFAULT_OVERLAP = 256
+# Default window when none is configured. Every window is one row of a
+# scheduler batch, and with 8 rows and 4 beams LED's full 16384-token
+# capacity can exhaust memory in a single generate call.
+DEFAULT_WINDOW = 4096
+# Reduce levels before the remaining summaries are cut to one window
+DEFAULT_MAX_LEVELS = 4
+# On average one keyed piece in GROUP_DIVISOR closes its window early
+GROUP_DIVISOR = 4
+
+
+def model_capacity(model, default=4096):
+    # LED exposes its real encoder length; fall back for other architectures
+    config = getattr(model, "config", None)
+    for attr in ("max_encoder_position_embeddings", "max_position_embeddings"):
+        value = getattr(config, attr, None)
+        if value:
+            return value
+    return default
+
+
+def token_windows(input_ids, window, overlap=DEFAULT_OVERLAP):
+    """Split token ids into overlapping windows of at most `window` tokens."""
+    if window <= overlap:
+        raise ValueError("Window must be larger than the overlap")
+    if len(input_ids) <= window:
+        return [input_ids]
+    stride = window - overlap
+    windows = []
+    for start in range(0, len(input_ids), stride):
+        windows.append(input_ids[start:start + window])
+        if start + window >= len(input_ids):
+            break
+    return windows
+
+
+def pack_groups(lengths, capacity, closes):
+    """Group consecutive pieces into windows of at most `capacity` tokens.
+    A window also closes after every piece with closes[i] set; when that
+    depends only on the piece's content, an edit regroups the windows up to
+    the next such piece and the grouping after it stays the same."""
+    groups, current, used = [], [], 0
+    for index, length in enumerate(lengths):
+        if current and used + length > capacity:
+            groups.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += length
+        if closes[index]:
+            groups.append(current)
+            current, used = [], 0
+    if current:
+        groups.append(current)
+    return groups
+
+
+class MapReduceSummarizer:
+    """Hierarchical summarization for documents longer than one model window.
+
+    The map stage summarizes overlapping token windows through the
+    generation scheduler (so chunks are batched together), and the reduce
+    stage summarizes the concatenated chunk summaries, repeating until they
+    fit in a single window. `summarize()` is a generator that yields one
+    event per finished stage so callers can stream progress."""
+
+    def __init__(self, scheduler, load_model, window=None, overlap=DEFAULT_OVERLAP,
+                 max_chunks=16, time_limit=300.0, max_levels=DEFAULT_MAX_LEVELS):
+        self.scheduler = scheduler
+        self.load_model = load_model
+        self.window = window
+        self.overlap = overlap
+        self.max_chunks = max_chunks
+        self.time_limit = time_limit
+        self.max_levels = max_levels
+
+    def _window_size(self, model):
+        capacity = model_capacity(model)
+        return min(self.window or DEFAULT_WINDOW, capacity)
+
+    def _windows(self, tokenizer, input_ids, window):
+        # Leave room for the <s> and </s> tokens the model expects
+        return [
+            tokenizer.build_inputs_with_special_tokens(ids)
+            for ids in token_windows(input_ids, window - 2, self.overlap)
+        ]
+
+    def _run_stage(self, windows, gen_kwargs, deadline):
+        futures = [self.scheduler.submit_ids(ids, **gen_kwargs) for ids in windows]
+        for index, future in enumerate(futures):
+            remaining = deadline - time.perf_counter()
+            try:
+                yield index, future.result(timeout=max(remaining, 0))
+            except FutureTimeoutError:
+                for pending in futures[index:]:
+                    pending.cancel()
+                raise TimeoutError(f"Summarization exceeded the {self.time_limit:.0f}s time limit")
+
+    def summarize(self, text, gen_kwargs):
+        started = time.perf_counter()
+        deadline = started + self.time_limit
+        model, tokenizer = self.load_model()
+        window = self._window_size(model)
+
+        input_ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+        windows = self._windows(tokenizer, input_ids, window)
+        truncated = len(windows) > self.max_chunks
+        windows = windows[:self.max_chunks]
+
+        # A document that fits in one window needs no reduce stage
+        if len(windows) == 1:
+            for _, summary in self._run_stage(windows, gen_kwargs, deadline):
+                yield {"stage": "final", "summary": summary, "chunks": 1,
+                       "truncated": truncated, "elapsed": round(time.perf_counter() - started, 2)}
+            return
+
+        summaries = [None] * len(windows)
+        for index, summary in self._run_stage(windows, gen_kwargs, deadline):
+            summaries[index] = summary
+            yield {"stage": "map", "chunk": index, "total_chunks": len(windows), "summary": summary}
+        yield from self._reduce(tokenizer, window, summaries, gen_kwargs, started, deadline, truncated)
+
+    def pack_pieces(self, pieces, keys=None):
+        """Pack consecutive pieces chosen by the caller (e.g. content-defined
+        chunks) into model windows. Returns (windows, window_keys, truncated):
+        token ids per window, the piece keys each window covers (None without
+        `keys`), and whether windows past max_chunks were dropped.
+
+        With keys, a window also closes after a piece whose key hashes to 0
+        mod GROUP_DIVISOR, so the windows around an unchanged piece keep the
+        same keys after an edit elsewhere. A piece longer than a window is
+        split into overlapping windows rather than truncated."""
+        model, tokenizer = self.load_model()
+        capacity = self._window_size(model) - 2
+        pieces = list(pieces) or [""]
+        piece_ids = tokenizer(pieces, add_special_tokens=False)["input_ids"]
+        closes = [keys is not None and zlib.crc32(keys[i].encode("utf-8")) % GROUP_DIVISOR == 0
+                  for i in range(len(pieces))]
+
+        windows, window_keys = [], []
+        for group in pack_groups([len(ids) for ids in piece_ids], capacity, closes):
+            group_key = tuple(keys[i] for i in group) if keys is not None else None
+            ids = [token for i in group for token in piece_ids[i]]
+            parts = token_windows(ids, capacity, self.overlap)
+            for part, part_ids in enumerate(parts):
+                windows.append(tokenizer.build_inputs_with_special_tokens(part_ids))
+                window_keys.append(group_key + (part,) if group_key is not None and len(parts) > 1 else group_key)
+        truncated = len(windows) > self.max_chunks
+        return windows[:self.max_chunks], window_keys[:self.max_chunks], truncated
+
+    def summarize_windows(self, windows, gen_kwargs, known=None, truncated=False):
+        """Map-reduce over windows from pack_pieces(). `known` maps window
+        index to a summary from an earlier run; only the other windows are
+        generated."""
+        started = time.perf_counter()
+        deadline = started + self.time_limit
+        model, tokenizer = self.load_model()
+        window = self._window_size(model)
+        known = known or {}
+
+        summaries = [known.get(index) for index in range(len(windows))]
+        for index, summary in enumerate(summaries):
+            if summary is not None:
+                yield {"stage": "map", "chunk": index, "total_chunks": len(windows), "summary": summary, "cached": True}
+
+        missing = [index for index, summary in enumerate(summaries) if summary is None]
+        if missing:
+            for position, summary in self._run_stage([windows[i] for i in missing], gen_kwargs, deadline):
+                index = missing[position]
+                summaries[index] = summary
+                yield {"stage": "map", "chunk": index, "total_chunks": len(windows), "summary": summary, "cached": False}
+
+        if len(windows) == 1:
+            yield {"stage": "final", "summary": summaries[0], "chunks": 1,
+                   "truncated": truncated, "elapsed": round(time.perf_counter() - started, 2)}
+            return
+        yield from self._reduce(tokenizer, window, summaries, gen_kwargs, started, deadline, truncated)
+
+    def _reduce(self, tokenizer, window, summaries, gen_kwargs, started, deadline, truncated):
+        # Summarize the concatenated summaries until they fit in one window
+        map_chunks = len(summaries)
+        level = 1
+        previous = None
+        while True:
+            combined = tokenizer(" ".join(summaries), add_special_tokens=False)["input_ids"]
+            # With a small window the summaries may never shrink below it;
+            # after max_levels, or once a level stops shrinking them, the
+            # final summary covers what fits in one window
+            if level > self.max_levels or (previous is not None and len(combined) >= previous):
+                combined = combined[:window - 2]
+                truncated = True
+            previous = len(combined)
+            windows = self._windows(tokenizer, combined, window)
+            stage = [s for _, s in self._run_stage(windows, gen_kwargs, deadline)]
+            if len(stage) == 1:
+                yield {"stage": "final", "summary": stage[0], "chunks": map_chunks,
+                       "truncated": truncated, "elapsed": round(time.perf_counter() - started, 2)}
+                return
+            yield {"stage": "reduce", "level": level, "summaries": stage}
+            summaries = stage
+            level += 1